@@ -0,0 +1,85 @@
+"""
+Scalable automaton families for the benchmarks. Every family maps a size n to a spec in the from_original form
+(fsm, initial_states, final_states) whose automata have about n states; specs depend only on n and the seed.
+"""
+
+import random
+from typing import Callable, Dict, Hashable, Set, Tuple
+
+from example import fsm_endswith, fsm_startswith
+from fsm_lib import FSM
+
+Spec = Tuple[Dict[Hashable, Dict[Hashable, object]], Set[Hashable], Set[Hashable]]
+
+
+def random_dfa(n: int, seed: int = 0) -> Spec:
+    """
+    Random partial DFA over 'abcd' (FSM.generate).
+    """
+
+    fsm = FSM.generate(deterministic=True, states_alphabet=range(n), min_states=n, max_states=n,
+                       transitions_alphabet='abcd', min_transitions_from_state=2, max_transitions_from_state=4,
+                       min_initial_states=1, max_initial_states=1, min_final_states=1,
+                       max_final_states=max(1, n // 4), seed=seed)
+    return fsm.to_original()
+
+
+def nth_from_last(n: int, seed: int = 0) -> Spec:
+    """
+    NFA of (a|b)*a(a|b)^(k-1) with k = log2(n): k + 1 states whose minimal DFA has 2^k ~ n states.
+    """
+
+    k = max(1, n.bit_length() - 1)
+    fsm = {0: {'a': {0, 1}, 'b': {0}}}
+    for i in range(1, k):
+        fsm[i] = {'a': {i + 1}, 'b': {i + 1}}
+    fsm[k] = {}
+    return fsm, {0}, {k}
+
+
+def keyword_trie(n: int, seed: int = 0) -> Spec:
+    """
+    Random keywords over 'abcd' with about n characters in total; each keyword is a chain of states
+    entered by an epsilon transition from the initial state.
+    """
+
+    rng = random.Random(seed)
+    fsm = {0: {'epsilon': set()}}
+    final_states = set()
+    next_state = 1
+    while next_state < n:
+        length = rng.randint(3, 12)
+        fsm[0]['epsilon'].add(next_state)
+        for i in range(next_state, next_state + length):
+            fsm[i] = {rng.choice('abcd'): {i + 1}}
+        fsm[next_state + length] = {}
+        final_states.add(next_state + length)
+        next_state += length + 1
+    return fsm, {0}, final_states
+
+
+def startswith(n: int, seed: int = 0) -> Spec:
+    """
+    example.fsm_startswith with a random prefix of length n over '01'.
+    """
+
+    rng = random.Random(seed)
+    return fsm_startswith('01', ''.join(rng.choice('01') for _ in range(n)))
+
+
+def endswith(n: int, seed: int = 0) -> Spec:
+    """
+    example.fsm_endswith (already a minimal DFA) with a random suffix of length n over '01'.
+    """
+
+    rng = random.Random(seed)
+    return fsm_endswith('01', ''.join(rng.choice('01') for _ in range(n)))
+
+
+FAMILIES: Dict[str, Tuple[Callable[[int, int], Spec], str]] = {
+    'random_dfa': (random_dfa, 'abcd'),
+    'nth_from_last': (nth_from_last, 'ab'),
+    'keyword_trie': (keyword_trie, 'abcd'),
+    'startswith': (startswith, '01'),
+    'endswith': (endswith, '01'),
+}
@@ -0,0 +1,162 @@
+"""
+Offline benchmark suite for fsm_lib: times the construction, determinization, minimization and matching
+pipelines on the families of benchmarks/families.py, records peak memory (tracemalloc) and writes JSON
+that a later run can be compared with.
+
+    python benchmarks/run.py --sizes 10,100,1000,10000 --output results.json
+    python benchmarks/run.py --max-size 1000000 --output big.json
+    python benchmarks/run.py --compare results.json --output new.json
+
+A (family, operation) series stops growing once one size takes longer than --budget seconds.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.families import FAMILIES  # noqa: E402
+from fsm_lib import DeterministicFSM, FSM  # noqa: E402
+
+N_WORDS = 1000
+WORD_LENGTH = 100
+
+# operation: (function of the prepared inputs, size limit, families it is skipped for)
+# the determinized reversal of a random DFA is exponentially large, so _brzozowski skips random_dfa
+OPERATIONS = {
+    'from_original': (lambda inputs: FSM.from_original(*inputs['spec']), None, ()),
+    'eliminate_epsilon_transitions': (lambda inputs: inputs['fsm'].eliminate_epsilon_transitions(), None, ()),
+    'from_fsm': (lambda inputs: DeterministicFSM.from_fsm(inputs['fsm']), None, ()),
+    'minimize': (lambda inputs: inputs['dfsm'].minimize(), None, ()),
+    '_brzozowski': (lambda inputs: inputs['dfsm']._brzozowski(), 10 ** 4, ('random_dfa',)),
+    'reverse': (lambda inputs: inputs['fsm'].reverse(), None, ()),
+    'accepts': (lambda inputs: [inputs['dfsm'].accepts(word) for word in inputs['words']], None, ()),
+    'compiled_accepts_many': (lambda inputs: inputs['compiled'].accepts_many(inputs['words']), None, ()),
+}
+
+
+def prepare(family: str, size: int, seed: int) -> dict:
+    make_spec, alphabet = FAMILIES[family]
+    spec = make_spec(size, seed)
+    fsm = FSM.from_original(*spec)
+    dfsm = DeterministicFSM.from_fsm(fsm)
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(alphabet) for _ in range(WORD_LENGTH)) for _ in range(N_WORDS)]
+    return {'spec': spec, 'fsm': fsm, 'dfsm': dfsm, 'compiled': dfsm.compile(), 'words': words}
+
+
+def measure(function, inputs: dict, min_time: float, max_repeats: int) -> dict:
+    times = []
+    while len(times) < max_repeats and (not times or sum(times) < min_time):
+        start = time.perf_counter()
+        function(inputs)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds_min': min(times), 'seconds_median': statistics.median(times), 'repeats': len(times),
+            'peak_bytes': peak}
+
+
+def run(families, operations, sizes, seed: int, budget: float, min_time: float, max_repeats: int):
+    results = []
+    for family in families:
+        stopped = set()
+        for size in sizes:
+            if len(stopped) == len(operations):
+                break
+            inputs = prepare(family, size, seed)
+            for operation in operations:
+                function, size_limit, skipped_families = OPERATIONS[operation]
+                if operation in stopped or size_limit is not None and size > size_limit or family in skipped_families:
+                    continue
+                result = {'family': family, 'size': size, 'operation': operation,
+                          'n_states': len(inputs['fsm'].get_states()), 'n_dfa_states': len(inputs['compiled'])}
+                result.update(measure(function, inputs, min_time, max_repeats))
+                results.append(result)
+                print(f"{family:>14} {size:>8} {operation:>30} {result['seconds_min']:>10.4f}s "
+                      f"{result['peak_bytes'] / 2 ** 20:>9.1f} MiB", file=sys.stderr)
+                if result['seconds_min'] > budget:
+                    stopped.add(operation)
+    return results
+
+
+def compare(baseline: dict, results: list, threshold: float) -> int:
+    """
+    Prints min-time ratios against a baseline JSON to stderr (stdout may carry the JSON report) and returns
+    the number of regressions above `threshold`.
+    """
+
+    old = {(r['family'], r['size'], r['operation']): r for r in baseline['results']}
+    regressions = 0
+    for result in results:
+        previous = old.get((result['family'], result['size'], result['operation']))
+        if previous is None or not previous['seconds_min']:
+            continue
+        ratio = result['seconds_min'] / previous['seconds_min']
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{result['family']:>14} {result['size']:>8} {result['operation']:>30} {ratio:>7.2f}x{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', default=','.join(FAMILIES))
+    parser.add_argument('--operations', default=','.join(OPERATIONS))
+    parser.add_argument('--sizes', default='10,100,1000,10000')
+    parser.add_argument('--max-size', type=int, default=None,
+                        help='use powers of ten from 10 up to this size instead of --sizes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=10.0, help='seconds per measurement before a series stops')
+    parser.add_argument('--min-time', type=float, default=0.2, help='repeat a measurement until this many seconds')
+    parser.add_argument('--max-repeats', type=int, default=5)
+    parser.add_argument('--output', default=None, help='JSON file for the results (stdout if omitted)')
+    parser.add_argument('--compare', default=None, help='baseline JSON to compare with')
+    parser.add_argument('--threshold', type=float, default=1.25, help='min-time ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    families = args.families.split(',')
+    operations = args.operations.split(',')
+    unknown = [name for name in families if name not in FAMILIES] + \
+              [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        parser.error(f'unknown families or operations: {unknown}')
+    if args.max_size is not None:
+        sizes = [10 ** k for k in range(1, len(str(args.max_size))) if 10 ** k <= args.max_size]
+    else:
+        sizes = [int(size) for size in args.sizes.split(',')]
+
+    results = run(families, operations, sizes, args.seed, args.budget, args.min_time, args.max_repeats)
+    report = {'meta': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                       'machine': platform.machine(), 'platform': platform.platform(),
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'seed': args.seed},
+              'results': results}
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+            f.write('\n')
+    if args.compare is not None:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), results, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -45,23 +45,6 @@ def fsm_endswith(alphabet: str, suffix: str) -> (Dict[str, Dict[str, str]], Set[
     return dfsm.minimize().to_original()
 
 
-def fsm_check(string: str,
-              fsm: Dict[str, Dict[str, str]],
-              initial_state: Union[str, Tuple[str]],
-              final_states: Union[str, Tuple[str],
-                                  List[Union[str, Tuple[str]]], Set[Union[str, Tuple[str]]]]) -> bool:
-    final_states = set(final_states) if isinstance(final_states, (set, list)) else {final_states}
-    state = initial_state
-    for x in string:
-        transition = fsm.get(state)
-        if transition is None:
-            return False
-        state = transition.get(x)
-        if state is None:
-            return False
-    return state in final_states
-
-
 def main():
     def print_fsm(fsm: Any, final_states: Any) -> None:
         import pprint
@@ -74,9 +57,11 @@ def main():
                        final_states: Union[str, Tuple[str],
                                            List[Union[str, Tuple[str]]],
                                            Set[Union[str, Tuple[str]]]]) -> None:
+        final_states = set(final_states) if isinstance(final_states, (set, list)) else {final_states}
+        dfsm = DeterministicFSM.from_original(fsm, {initial_state}, final_states, name_of_state_generator=None)
         examples = ['', '0', '1', '00', '01', '10', '11', '0001', '1000', '0110', '1100', '0011', '001100', '110011']
         for example in examples:
-            result = fsm_check(string=example, fsm=fsm, initial_state=initial_state, final_states=final_states)
+            result = dfsm.accepts(example)
             print(f"'{example}': {result}" + (', ' if example != examples[-1] else ''), end='')
         print(end='\n\n')
 
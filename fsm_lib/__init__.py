@@ -1,6 +1,14 @@
+from .cache import AutomatonCache
+from .compiled import CompiledDFA
+from .compiled import CompiledNFA
+from .compiled import CompressedDFA
 from .dfsm import DeterministicFSM
 from .epsilon import Epsilon
 from .fsm import FSM
+from .lazy import LazyDFA
+from .matcher import Matcher
+from .search import MultiMatcher
+from .search import Searcher
 from .state import State
 from .transition import Transition
 from .utils import determine_alphabet
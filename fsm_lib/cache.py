@@ -0,0 +1,153 @@
+import hashlib
+import os
+import tempfile
+from typing import Dict, Hashable, Optional, Set, Union
+
+from .compiled import CompiledDFA
+from .dfsm import DeterministicFSM
+from .fsm import FSM
+from .transition import Transition
+
+
+class AutomatonCache:
+    """
+    Directory of minimized, compiled DFAs shared by processes, keyed by a hash of the source spec.
+    A hit maps the file and serves the table from the mapped pages (no State/Transition objects are built,
+    and forked workers share one physical copy). Files are written to a temporary name and renamed,
+    so readers never see partial entries; the least recently used entries are evicted beyond
+    `max_entries` or `max_bytes`.
+    """
+
+    __slots__ = ('_path', '_max_entries', '_max_bytes')
+
+    SUFFIX = '.dfa'
+
+    def __init__(self, path: Union[str, os.PathLike], max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        cls_name = self.__class__.__name__
+        if max_entries is not None and (not isinstance(max_entries, int) or max_entries < 1):
+            raise ValueError(f'{cls_name}. Argument `max_entries` must be None or a positive int')
+        if max_bytes is not None and (not isinstance(max_bytes, int) or max_bytes < 1):
+            raise ValueError(f'{cls_name}. Argument `max_bytes` must be None or a positive int')
+        self._path = os.fspath(path)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        os.makedirs(self._path, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @staticmethod
+    def key(fsm: Union[FSM, Dict[Hashable, Dict[Hashable, Union[Hashable, Set[Hashable]]]]],
+            initial_states: Set[Hashable] = None, final_states: Set[Hashable] = None) -> str:
+        """
+        sha256 of a spec given as an FSM or in the from_original form. Single edges are hashed as sorted reprs,
+        so the key does not depend on insertion order or the hash seed (state ids and labels need a
+        deterministic repr).
+        """
+
+        if isinstance(fsm, FSM):
+            fsm, initial_states, final_states = fsm.to_original()
+        edges = []
+        for state, transitions in fsm.items():
+            for label, states_to in transitions.items():
+                if not isinstance(states_to, (set, frozenset)):
+                    states_to = {states_to}
+                label = Transition(label).label  # normalizes epsilon spellings as from_original does
+                edges.extend(repr((repr(state), repr(label), repr(state_to))) for state_to in states_to)
+        digest = hashlib.sha256(b'AutomatonCache:minimized:1\n')
+        for part in (sorted(edges), sorted(map(repr, initial_states)), sorted(map(repr, final_states))):
+            digest.update(repr(part).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CompiledDFA]:
+        file_path = self._file_path(key)
+        try:
+            compiled = CompiledDFA.load(file_path, mmap=True)
+        except FileNotFoundError:  # missing or evicted meanwhile
+            return None
+        except ValueError:  # corrupt
+            self._remove(file_path)
+            return None
+        try:
+            os.utime(file_path)  # mtime is the LRU clock
+        except OSError:
+            pass
+        return compiled
+
+    def put(self, key: str, compiled: CompiledDFA) -> None:
+        chunks = compiled._dump()
+        fd, tmp_path = tempfile.mkstemp(dir=self._path, prefix='.tmp-', suffix=self.SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.writelines(chunks)
+            os.replace(tmp_path, self._file_path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self._evict()
+
+    def get_or_build(self, fsm: Union[FSM, Dict[Hashable, Dict[Hashable, Union[Hashable, Set[Hashable]]]]],
+                     initial_states: Set[Hashable] = None, final_states: Set[Hashable] = None) -> CompiledDFA:
+        """
+        Returns the compiled minimal DFA of the spec, building (from_original -> from_fsm -> minimize -> compile)
+        and storing it only on a miss.
+        """
+
+        key = self.key(fsm, initial_states, final_states)
+        compiled = self.get(key)
+        if compiled is None:
+            if not isinstance(fsm, FSM):
+                fsm = FSM.from_original(fsm, initial_states, final_states)
+            compiled = DeterministicFSM.from_fsm(fsm, None).minimize(None).compile()
+            self.put(key, compiled)
+        return compiled
+
+    def clear(self) -> None:
+        for file_path in self._entries():
+            self._remove(file_path)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._file_path(key))
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}({self._path!r}, max_entries={self._max_entries}, '
+                f'max_bytes={self._max_bytes})')
+
+    def _file_path(self, key: str) -> str:
+        if not key.isalnum():
+            raise ValueError(f'{self.__class__.__name__}. Key must be alphanumeric, got: {key!r}')
+        return os.path.join(self._path, key + self.SUFFIX)
+
+    def _entries(self):
+        return [entry.path for entry in os.scandir(self._path)
+                if entry.name.endswith(self.SUFFIX) and not entry.name.startswith('.tmp-')]
+
+    def _evict(self) -> None:
+        if self._max_entries is None and self._max_bytes is None:
+            return
+        entries = []
+        for file_path in self._entries():
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_path))
+        entries.sort(reverse=True)  # most recently used first
+        n_bytes = 0
+        for n_entries, (_, size, file_path) in enumerate(entries, 1):
+            n_bytes += size
+            if (self._max_entries is not None and n_entries > self._max_entries or
+                    self._max_bytes is not None and n_bytes > self._max_bytes and n_entries > 1):
+                self._remove(file_path)
+
+    @staticmethod
+    def _remove(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
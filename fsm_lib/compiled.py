@@ -0,0 +1,770 @@
+import ast
+import hashlib
+import mmap as _mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .interned import InternedFSM, closure_masks
+from .state import State
+
+DEAD = -1
+
+_MAGIC = b'FSMDFA\x00\x01'
+_HEADER = struct.Struct('<8sIIiI')  # magic, n_states, n_symbols, initial_state, size of the label table
+_BYTE_BITS = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]  # bitmap byte -> 8 flags
+
+
+class CompiledDFA:
+    """
+    Immutable integer form of a deterministic FSM.
+    States are renumbered to 0..n_states-1, labels are mapped to column indexes,
+    and transitions are kept in a flat array('i') of n_states * n_symbols entries (DEAD for missing edges).
+    """
+
+    __slots__ = ('_symbols', '_symbol_index', '_n_states', '_table', '_initial_state', '_final_flags',
+                 '_batch_tables')
+
+    DEAD = DEAD
+
+    def __init__(self, *,
+                 symbols: Tuple[Hashable, ...],
+                 table: Iterable[int],
+                 n_states: int,
+                 initial_state: int,
+                 final_states: Iterable[int]):
+        cls_name = self.__class__.__name__
+        symbols = tuple(symbols)
+        table = table if isinstance(table, array) and table.typecode == 'i' else array('i', table)
+        if len(table) != n_states * len(symbols):
+            raise ValueError(f'{cls_name}. Table must have n_states * n_symbols entries; '
+                             f'got {len(table)} != {n_states} * {len(symbols)}')
+        if not (initial_state == DEAD or 0 <= initial_state < n_states):
+            raise ValueError(f'{cls_name}. Initial state is out of range: {initial_state}')
+        final_flags = bytearray(n_states)
+        for state in final_states:
+            final_flags[state] = 1
+        self._symbols = symbols
+        self._symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        self._n_states = n_states
+        self._table = table
+        self._initial_state = initial_state
+        self._final_flags = bytes(final_flags)
+        self._batch_tables = None
+
+    @property
+    def symbols(self) -> Tuple[Hashable, ...]:
+        return self._symbols
+
+    @property
+    def n_states(self) -> int:
+        return self._n_states
+
+    @property
+    def n_symbols(self) -> int:
+        return len(self._symbols)
+
+    @property
+    def initial_state(self) -> int:
+        return self._initial_state
+
+    @property
+    def final_states(self) -> FrozenSet[int]:
+        return frozenset(i for i, flag in enumerate(self._final_flags) if flag)
+
+    def is_final(self, state: int) -> bool:
+        return state != DEAD and bool(self._final_flags[state])
+
+    def step(self, state: int, symbol: Hashable) -> int:
+        column = self._symbol_index.get(symbol)
+        if state == DEAD or column is None:
+            return DEAD
+        return self._table[state * len(self._symbols) + column]
+
+    def run(self, word: Iterable[Hashable]) -> int:
+        """
+        Returns the state reached after reading `word` from the initial state (DEAD if the run gets stuck).
+        """
+
+        return self.feed(self._initial_state, word)
+
+    def feed(self, state: int, symbols: Iterable[Hashable]) -> int:
+        """
+        Continues a run from `state`; used for incremental (streaming) input.
+        """
+
+        table = self._table
+        symbol_index = self._symbol_index
+        n_symbols = len(self._symbols)
+        if state == DEAD:
+            return DEAD
+        for symbol in symbols:
+            column = symbol_index.get(symbol)
+            if column is None:
+                return DEAD
+            state = table[state * n_symbols + column]
+            if state == DEAD:
+                return DEAD
+        return state
+
+    def accepts(self, word: Iterable[Hashable]) -> bool:
+        state = self.run(word)
+        return state != DEAD and bool(self._final_flags[state])
+
+    def accepts_many(self, words: Sequence[Iterable[Hashable]]) -> List[bool]:
+        """
+        Checks a batch of words at once (numpy required for the vectorized path, otherwise words run one by one).
+        All words advance together, one fancy-indexed table lookup per position; words are ordered by length,
+        so the ones that have already ended are dropped by slicing instead of masking.
+        """
+
+        words = words if isinstance(words, (list, tuple)) else list(words)
+        try:
+            import numpy
+        except ImportError:
+            return [self.accepts(word) for word in words]
+        if not words:
+            return []
+        table, final_flags = self._get_batch_tables(numpy)
+        lengths = numpy.fromiter(map(len, words), dtype=numpy.intp, count=len(words))
+        columns = self._encode_words(numpy, words)
+        dead = self._n_states
+        order = numpy.argsort(-lengths, kind='stable')
+        sorted_lengths = lengths[order]
+        offsets = (numpy.cumsum(lengths) - lengths)[order]
+        states = numpy.full(len(words), dead if self._initial_state == DEAD else self._initial_state,
+                            dtype=numpy.intp)
+        # number of words still running at each position (sorted_lengths is non-increasing)
+        n_running = numpy.searchsorted(-sorted_lengths, -numpy.arange(int(sorted_lengths[0])), side='left')
+        for position, k in enumerate(n_running.tolist()):
+            running = states[:k]
+            running[:] = table[running, columns[offsets[:k] + position]]
+            if position % 64 == 63 and not (running != dead).any():
+                break
+        accepted = numpy.empty(len(words), dtype=bool)
+        accepted[order] = final_flags[states]
+        return accepted.tolist()
+
+    def _get_batch_tables(self, numpy):
+        # table with an extra dead row (index n_states) and an extra column for unknown symbols
+        if self._batch_tables is None:
+            n_states, n_symbols = self._n_states, len(self._symbols)
+            table = numpy.full((n_states + 1, n_symbols + 1), n_states, dtype=numpy.intp)
+            if n_states and n_symbols:
+                compact = numpy.frombuffer(self._table, dtype=numpy.intc).reshape(n_states, n_symbols)
+                table[:n_states, :n_symbols] = numpy.where(compact == DEAD, n_states, compact)
+            final_flags = numpy.zeros(n_states + 1, dtype=bool)
+            final_flags[:n_states] = numpy.frombuffer(self._final_flags, dtype=numpy.uint8).astype(bool)
+            self._batch_tables = (table, final_flags)
+        return self._batch_tables
+
+    def _encode_words(self, numpy, words):
+        # flat array of column indexes of all words; unknown symbols get the column n_symbols
+        symbol_index = self._symbol_index
+        unknown = len(self._symbols)
+        if all(isinstance(word, str) for word in words) and \
+                all(isinstance(symbol, str) and len(symbol) == 1 for symbol in self._symbols):
+            codes = numpy.frombuffer(''.join(words).encode('utf-32-le'), dtype=numpy.uint32)
+            lookup_size = max(map(ord, self._symbols), default=-1) + 2
+        elif all(isinstance(word, (bytes, bytearray)) for word in words) and \
+                all(isinstance(symbol, int) and 0 <= symbol < 256 for symbol in self._symbols):
+            codes = numpy.frombuffer(b''.join(words), dtype=numpy.uint8)
+            lookup_size = 256
+        else:
+            return numpy.fromiter((symbol_index.get(symbol, unknown) for word in words for symbol in word),
+                                  dtype=numpy.intp)
+        lookup = numpy.full(lookup_size, unknown, dtype=numpy.intp)
+        for symbol, column in symbol_index.items():
+            lookup[ord(symbol) if isinstance(symbol, str) else symbol] = column
+        if codes.dtype != numpy.uint8:
+            codes = numpy.minimum(codes, lookup_size - 1)
+        return lookup[codes]
+
+    def symbol_classes(self) -> List[Tuple[Hashable, ...]]:
+        """
+        Symbols grouped into equivalence classes: symbols whose transitions are equal in every state cannot be
+        told apart by the DFA. Classes are ordered by their first column.
+        """
+
+        class_of, representatives = column_classes(self._table, len(self._symbols))
+        classes = [[] for _ in representatives]
+        for symbol, some_class in zip(self._symbols, class_of):
+            classes[some_class].append(symbol)
+        return [tuple(some_class) for some_class in classes]
+
+    def compress(self) -> 'CompressedDFA':
+        """
+        The same DFA with one table column per symbol class (see CompressedDFA).
+        """
+
+        return CompressedDFA(self)
+
+    def canonical(self) -> 'CompiledDFA':
+        """
+        Renumbers states in BFS order from the initial state, visiting columns in sorted-label order.
+        Unreachable states are dropped; isomorphic DFAs get identical tables whatever their state names were.
+        """
+
+        symbols = sorted_labels(self._symbols)
+        columns = [self._symbol_index[symbol] for symbol in symbols]
+        if self._initial_state == DEAD:
+            return self.__class__(symbols=symbols, table=array('i'), n_states=0, initial_state=DEAD,
+                                  final_states=())
+        table = self._table
+        n_symbols = len(symbols)
+        new_ids = {self._initial_state: 0}
+        order = [self._initial_state]
+        new_table = array('i')
+        for state in order:
+            row = state * n_symbols
+            for column in columns:
+                state_to = table[row + column]
+                if state_to != DEAD:
+                    new_id = new_ids.get(state_to)
+                    if new_id is None:
+                        new_id = new_ids[state_to] = len(order)
+                        order.append(state_to)
+                    state_to = new_id
+                new_table.append(state_to)
+        final_flags = self._final_flags
+        return self.__class__(symbols=symbols, table=new_table, n_states=len(order), initial_state=0,
+                              final_states=[i for i, state in enumerate(order) if final_flags[state]])
+
+    def fingerprint(self) -> str:
+        """
+        Stable hex digest (sha256) of the canonical table: equal for isomorphic DFAs, independent of state names,
+        hash seed and platform, so it can key caches shared between processes.
+        Labels enter the digest by their repr, which must therefore be deterministic.
+        """
+
+        canonical = self.canonical()
+        digest = hashlib.sha256(b'CompiledDFA:1\n')
+        digest.update(repr(canonical._symbols).encode('utf-8'))
+        digest.update(b'\n%d %d\n' % (canonical._n_states, canonical._initial_state))
+        digest.update(little_endian_bytes(canonical._table))
+        digest.update(canonical._final_flags)
+        return digest.hexdigest()
+
+    @classmethod
+    def _from_parts(cls, symbols: Tuple[Hashable, ...], table, n_states: int, initial_state: int,
+                    final_flags: bytes) -> 'CompiledDFA':
+        """
+        Constructor without validation or copying; `table` may be any int32 buffer indexable by position
+        (array('i') or a memoryview cast to 'i').
+        """
+        obj = object.__new__(cls)
+        obj._symbols = symbols
+        obj._symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        obj._n_states = n_states
+        obj._table = table
+        obj._initial_state = initial_state
+        obj._final_flags = final_flags
+        obj._batch_tables = None
+        return obj
+
+    def _dump(self) -> List[bytes]:
+        """
+        Binary image (see save) as a list of chunks.
+        """
+
+        labels = repr(self._symbols).encode('utf-8')
+        try:
+            round_trip = ast.literal_eval(labels.decode('utf-8')) == self._symbols
+        except (ValueError, SyntaxError):
+            round_trip = False
+        if not round_trip:
+            raise ValueError(f'{self.__class__.__name__}. Labels must be Python literals to be serialized')
+        labels += b' ' * (-(_HEADER.size + len(labels)) % 4)
+        final_flags = self._final_flags + bytes(-self._n_states % 8)
+        final_bitmap = bytes(sum(flag << bit for bit, flag in enumerate(final_flags[i:i + 8]))
+                             for i in range(0, len(final_flags), 8))
+        return [_HEADER.pack(_MAGIC, self._n_states, len(self._symbols), self._initial_state, len(labels)),
+                labels, little_endian_bytes(array('i', self._table)),
+                final_bitmap]
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Writes the binary image (all integers little-endian):
+
+        - header, 24 bytes: magic b'FSMDFA\\x00\\x01', uint32 n_states, uint32 n_symbols, int32 initial_state
+          (-1 if there is none), uint32 size of the symbol table;
+        - symbol table: UTF-8 repr of the tuple of labels (column order), space-padded so the table starts
+          at a multiple of 4; labels must be Python literals;
+        - transition table: n_states * n_symbols int32, row-major, -1 for missing transitions;
+        - final states: bitmap of (n_states + 7) // 8 bytes, state i is bit i % 8 of byte i // 8.
+        """
+
+        with open(path, 'wb') as f:
+            f.writelines(self._dump())
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike], mmap: bool = True) -> 'CompiledDFA':
+        """
+        Reads an image written by save. With mmap=True the file is mapped read-only and the transition table
+        is used in place (a memoryview of the mapping, also readable by numpy.frombuffer): loading does not
+        depend on the table size, and processes loading the same file share its pages.
+        """
+
+        with open(path, 'rb') as f:
+            buffer = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ) if mmap else f.read()
+        return cls._from_buffer(buffer)
+
+    @classmethod
+    def _from_buffer(cls, buffer) -> 'CompiledDFA':
+        """
+        Parses an image; on little-endian hosts the table is a view of `buffer`, not a copy.
+        """
+
+        cls_name = cls.__name__
+        buffer = memoryview(buffer).cast('B')
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f'{cls_name}. Truncated automaton image')
+        magic, n_states, n_symbols, initial_state, labels_size = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise ValueError(f'{cls_name}. Not an automaton image (bad magic)')
+        table_start = _HEADER.size + labels_size
+        table_end = table_start + 4 * n_states * n_symbols
+        if len(buffer) != table_end + (n_states + 7) // 8:
+            raise ValueError(f'{cls_name}. Truncated automaton image')
+        try:
+            symbols = ast.literal_eval(bytes(buffer[_HEADER.size:table_start]).decode('utf-8'))
+        except (ValueError, SyntaxError):
+            raise ValueError(f'{cls_name}. Malformed symbol table') from None
+        if not isinstance(symbols, tuple) or len(symbols) != n_symbols:
+            raise ValueError(f'{cls_name}. Malformed symbol table')
+        table = buffer[table_start:table_end].cast('i')
+        if sys.byteorder != 'little':
+            table = array('i', table.tobytes())
+            table.byteswap()
+        final_flags = b''.join(map(_BYTE_BITS.__getitem__, buffer[table_end:]))[:n_states]
+        return cls._from_parts(tuple(symbols), table, n_states, initial_state, final_flags)
+
+    def __len__(self) -> int:
+        return self._n_states
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(n_states={self._n_states}, n_symbols={len(self._symbols)}, '
+                f'initial_state={self._initial_state}, n_final_states={sum(self._final_flags)})')
+
+    @classmethod
+    def from_fsm(cls, fsm_obj) -> 'CompiledDFA':
+        """
+        Compiles the part of a deterministic FSM reachable from its initial states.
+        Several initial states are merged by the subset construction (the language is their union).
+        """
+
+        if len(fsm_obj._initial_states) == 1:
+            compiled = cls._from_deterministic(fsm_obj)
+            if compiled is not None:
+                return compiled
+        interned = InternedFSM(fsm_obj)
+        delta = interned.delta
+        final_states = interned.final_states
+        symbols = tuple(interned.labels)
+        initial_subset = frozenset(interned.initial_states)
+        if not initial_subset:
+            return cls(symbols=symbols, table=array('i'), n_states=0, initial_state=DEAD, final_states=())
+
+        subset_ids: Dict[FrozenSet[int], int] = {initial_subset: 0}
+        subsets = [initial_subset]
+        table = array('i')
+        new_final_states = []
+        empty = (DEAD,) * len(symbols)
+        for state_id, subset in enumerate(subsets):
+            row = list(empty)
+            if len(subset) == 1:
+                targets_by_column = delta[next(iter(subset))]
+            else:
+                targets_by_column = dict()
+                for state in subset:
+                    for column, targets in delta[state].items():
+                        targets_by_column.setdefault(column, set()).update(targets)
+            for column, targets in targets_by_column.items():
+                if not targets:
+                    continue
+                targets = frozenset(targets)
+                target_id = subset_ids.get(targets)
+                if target_id is None:
+                    target_id = subset_ids[targets] = len(subsets)
+                    subsets.append(targets)
+                row[column] = target_id
+            table.extend(row)
+            if not final_states.isdisjoint(subset):
+                new_final_states.append(state_id)
+        return cls(symbols=symbols, table=table, n_states=len(subsets), initial_state=0,
+                   final_states=new_final_states)
+
+    @classmethod
+    def _from_deterministic(cls, fsm_obj) -> Optional['CompiledDFA']:
+        """
+        Direct path of from_fsm for one initial state: states are numbered in BFS order and the table is filled
+        from the transition dicts, without interning or subsets. Returns None if a transition is an epsilon one
+        or has several targets.
+        """
+
+        fsm = fsm_obj._fsm
+        symbol_index: Dict[Hashable, int] = dict()
+        for transitions in fsm.values():
+            for transition in transitions:
+                if transition not in symbol_index:
+                    if transition.is_epsilon():
+                        return None
+                    symbol_index[transition] = len(symbol_index)
+        n_symbols = len(symbol_index)
+        final_states = fsm_obj._final_states
+        initial_state = next(iter(fsm_obj._initial_states))
+        state_ids = {initial_state: 0}
+        order = [initial_state]
+        table = array('i')
+        final_flags = bytearray()
+        empty = [DEAD] * n_symbols
+        no_transitions = dict()
+        for state in order:
+            row = empty.copy()
+            for transition, state_to in fsm.get(state, no_transitions).items():
+                if not isinstance(state_to, State):
+                    if len(state_to) != 1:
+                        if state_to:
+                            return None
+                        continue
+                    state_to = next(iter(state_to))
+                target_id = state_ids.get(state_to)
+                if target_id is None:
+                    target_id = state_ids[state_to] = len(order)
+                    order.append(state_to)
+                row[symbol_index[transition]] = target_id
+            table.extend(row)
+            final_flags.append(state in final_states)
+        return cls._from_parts(tuple(transition.label for transition in symbol_index), table, len(order), 0,
+                               bytes(final_flags))
+
+
+def sorted_labels(labels: Iterable[Hashable]) -> List[Hashable]:
+    """
+    Labels in a deterministic order: natural order if they are comparable, otherwise by (type name, repr).
+    """
+
+    labels = list(labels)
+    try:
+        return sorted(labels)
+    except TypeError:
+        return sorted(labels, key=lambda label: (type(label).__qualname__, repr(label)))
+
+
+def little_endian_bytes(table: array) -> bytes:
+    if sys.byteorder == 'little':
+        return table.tobytes()
+    table = array(table.typecode, table)
+    table.byteswap()
+    return table.tobytes()
+
+
+def column_classes(table, n_columns: int) -> Tuple[List[int], List[int]]:
+    """
+    Groups the columns of a row-major table (list, array or memoryview) that are equal in every row; returns the
+    class of every column and the first column of every class. Columns are bucketed by hash and compared with
+    the representatives, so only one column at a time is copied.
+    """
+
+    class_of = []
+    representatives = []
+    buckets: Dict[int, List[int]] = dict()
+    for column in range(n_columns):
+        values = table[column::n_columns]
+        bucket = buckets.setdefault(hash(tuple(values) if isinstance(values, list) else values.tobytes()), [])
+        for some_class in bucket:
+            if table[representatives[some_class]::n_columns] == values:
+                break
+        else:
+            some_class = len(representatives)
+            representatives.append(column)
+            bucket.append(some_class)
+        class_of.append(some_class)
+    return class_of, representatives
+
+
+def select_columns(table, n_rows: int, n_columns: int, columns: Sequence[int]):
+    """
+    Row-major table made of the given columns of `table` (a list for a list, otherwise an array('i')).
+    """
+
+    width = len(columns)
+    new_table = [0] * (n_rows * width) if isinstance(table, list) else array('i', [0]) * (n_rows * width)
+    for new_column, column in enumerate(columns):
+        values = table[column::n_columns]
+        new_table[new_column::width] = array('i', values.tobytes()) if isinstance(values, memoryview) else values
+    return new_table
+
+
+class CompressedDFA:
+    """
+    CompiledDFA whose alphabet is compressed into symbol equivalence classes (see CompiledDFA.symbol_classes):
+    the table has one column per class instead of one per symbol. Symbols are mapped to classes by a dict and,
+    when all of them are bytes (ints 0..255), by a 256-entry map that translates bytes input at C speed.
+    decompress() restores the per-symbol table, so canonical forms and fingerprints are unchanged.
+    """
+
+    __slots__ = ('_symbols', '_class_of', '_byte_map', '_n_classes', '_n_states', '_table', '_initial_state',
+                 '_final_flags')
+
+    DEAD = DEAD
+
+    _UNKNOWN_BYTE = 255
+
+    def __init__(self, compiled: CompiledDFA):
+        cls_name = self.__class__.__name__
+        if not isinstance(compiled, CompiledDFA):
+            raise TypeError(f'{cls_name}. Argument must be an object of class CompiledDFA, got: {type(compiled)}')
+        symbols = compiled._symbols
+        class_of, representatives = column_classes(compiled._table, len(symbols))
+        self._symbols = symbols
+        self._class_of = dict(zip(symbols, class_of))
+        self._n_classes = len(representatives)
+        self._n_states = compiled._n_states
+        self._table = select_columns(compiled._table, compiled._n_states, len(symbols), representatives)
+        self._initial_state = compiled._initial_state
+        self._final_flags = compiled._final_flags
+        self._byte_map = None
+        if self._n_classes < self._UNKNOWN_BYTE and all(type(symbol) is int and 0 <= symbol < 256
+                                                        for symbol in symbols):
+            byte_map = bytearray([self._UNKNOWN_BYTE]) * 256
+            for symbol, some_class in self._class_of.items():
+                byte_map[symbol] = some_class
+            self._byte_map = bytes(byte_map)
+
+    @property
+    def symbols(self) -> Tuple[Hashable, ...]:
+        return self._symbols
+
+    @property
+    def n_states(self) -> int:
+        return self._n_states
+
+    @property
+    def n_classes(self) -> int:
+        return self._n_classes
+
+    @property
+    def initial_state(self) -> int:
+        return self._initial_state
+
+    @property
+    def final_states(self) -> FrozenSet[int]:
+        return frozenset(i for i, flag in enumerate(self._final_flags) if flag)
+
+    def is_final(self, state: int) -> bool:
+        return state != DEAD and bool(self._final_flags[state])
+
+    def class_of(self, symbol: Hashable) -> int:
+        """
+        Column of `symbol` in the table, -1 if it is not in the alphabet.
+        """
+
+        return self._class_of.get(symbol, -1)
+
+    def step(self, state: int, symbol: Hashable) -> int:
+        some_class = self._class_of.get(symbol)
+        if state == DEAD or some_class is None:
+            return DEAD
+        return self._table[state * self._n_classes + some_class]
+
+    def run(self, word: Iterable[Hashable]) -> int:
+        return self.feed(self._initial_state, word)
+
+    def feed(self, state: int, symbols: Iterable[Hashable]) -> int:
+        """
+        Continues a run from `state` (see CompiledDFA.feed).
+        """
+
+        if state == DEAD:
+            return DEAD
+        table = self._table
+        n_classes = self._n_classes
+        if self._byte_map is not None and isinstance(symbols, (bytes, bytearray)):
+            classes = symbols.translate(self._byte_map)
+            if self._UNKNOWN_BYTE in classes:
+                return DEAD
+        else:
+            class_of = self._class_of
+            classes = (class_of.get(symbol) for symbol in symbols)
+        for some_class in classes:
+            if some_class is None:
+                return DEAD
+            state = table[state * n_classes + some_class]
+            if state == DEAD:
+                return DEAD
+        return state
+
+    def accepts(self, word: Iterable[Hashable]) -> bool:
+        state = self.run(word)
+        return state != DEAD and bool(self._final_flags[state])
+
+    def decompress(self) -> CompiledDFA:
+        """
+        The CompiledDFA with one column per symbol it was built from.
+        """
+
+        classes = [self._class_of[symbol] for symbol in self._symbols]
+        table = select_columns(self._table, self._n_states, self._n_classes, classes)
+        return CompiledDFA._from_parts(self._symbols, table, self._n_states, self._initial_state, self._final_flags)
+
+    def fingerprint(self) -> str:
+        return self.decompress().fingerprint()
+
+    def __len__(self) -> int:
+        return self._n_states
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(n_states={self._n_states}, n_symbols={len(self._symbols)}, '
+                f'n_classes={self._n_classes}, initial_state={self._initial_state}, '
+                f'n_final_states={sum(self._final_flags)})')
+
+
+class CompiledNFA:
+    """
+    Bit-parallel form of a (possibly nondeterministic) FSM.
+    The set of active states is an int bitmask (bit i is state i). For every symbol the successor mask of
+    each state is precomputed together with its epsilon closure, and the successor mask of every non-zero
+    byte of the active set is memoized, so one step costs at most O(|Q| / 8) big-int ORs.
+    """
+
+    __slots__ = ('_symbols', '_symbol_index', '_n_states', '_n_bytes', '_successors', '_initial_mask',
+                 '_final_mask', '_byte_cache')
+
+    DEAD = 0
+
+    def __init__(self, *,
+                 symbols: Tuple[Hashable, ...],
+                 successors: Sequence[Sequence[int]],
+                 n_states: int,
+                 initial_mask: int,
+                 final_mask: int):
+        """
+        :param symbols: labels; symbol i owns the column successors[i]
+        :param successors: successors[i][state] is the epsilon-closed mask of states reachable by symbol i
+        :param n_states:
+        :param initial_mask: epsilon-closed mask of initial states
+        :param final_mask:
+        """
+        cls_name = self.__class__.__name__
+        symbols = tuple(symbols)
+        if len(successors) != len(symbols) or any(len(column) != n_states for column in successors):
+            raise ValueError(f'{cls_name}. Successors must have n_symbols columns of n_states masks')
+        self._symbols = symbols
+        self._symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        self._n_states = n_states
+        self._n_bytes = (n_states + 7) // 8
+        self._successors = tuple(tuple(column) for column in successors)
+        self._initial_mask = initial_mask
+        self._final_mask = final_mask
+        self._byte_cache = tuple(dict() for _ in symbols)
+
+    @property
+    def symbols(self) -> Tuple[Hashable, ...]:
+        return self._symbols
+
+    @property
+    def n_states(self) -> int:
+        return self._n_states
+
+    @property
+    def initial_state(self) -> int:
+        return self._initial_mask
+
+    @property
+    def final_mask(self) -> int:
+        return self._final_mask
+
+    def is_final(self, mask: int) -> bool:
+        return bool(mask & self._final_mask)
+
+    def step(self, mask: int, symbol: Hashable) -> int:
+        column = self._symbol_index.get(symbol)
+        if column is None or not mask:
+            return 0
+        return self._step(mask, column)
+
+    def _step(self, mask: int, column: int) -> int:
+        successors = self._successors[column]
+        cache = self._byte_cache[column]
+        data = mask.to_bytes(self._n_bytes, 'little')
+        result = 0
+        for match in _NON_ZERO_BYTE.finditer(data):
+            position = match.start()
+            key = (position << 8) | data[position]
+            chunk = cache.get(key)
+            if chunk is None:
+                chunk = 0
+                base = position << 3
+                byte = data[position]
+                while byte:
+                    low = byte & -byte
+                    chunk |= successors[base + low.bit_length() - 1]
+                    byte ^= low
+                cache[key] = chunk
+            result |= chunk
+        return result
+
+    def run(self, word: Iterable[Hashable]) -> int:
+        """
+        Returns the mask of states reached after reading `word` (0 if the run gets stuck).
+        """
+
+        return self.feed(self._initial_mask, word)
+
+    def feed(self, mask: int, symbols: Iterable[Hashable]) -> int:
+        """
+        Continues a run from `mask`; used for incremental (streaming) input.
+        """
+
+        symbol_index = self._symbol_index
+        step = self._step
+        for symbol in symbols:
+            if not mask:
+                return 0
+            column = symbol_index.get(symbol)
+            if column is None:
+                return 0
+            mask = step(mask, column)
+        return mask
+
+    def accepts(self, word: Iterable[Hashable]) -> bool:
+        return bool(self.run(word) & self._final_mask)
+
+    def __len__(self) -> int:
+        return self._n_states
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}(n_states={self._n_states}, n_symbols={len(self._symbols)}, '
+                f'n_initial_states={bin(self._initial_mask).count("1")}, '
+                f'n_final_states={bin(self._final_mask).count("1")})')
+
+    @classmethod
+    def from_fsm(cls, fsm_obj) -> 'CompiledNFA':
+        interned = InternedFSM(fsm_obj)
+        n_states = len(interned)
+        component, component_closures = closure_masks(interned.epsilon)
+        closures = [component_closures[c] for c in component]
+
+        def close(mask):
+            result = mask
+            while mask:
+                low = mask & -mask
+                result |= closures[low.bit_length() - 1]
+                mask ^= low
+            return result
+
+        successors = [[0] * n_states for _ in interned.symbols]
+        for i, transitions in enumerate(interned.delta):
+            for column, states_to in transitions.items():
+                successors[column][i] = close(sum(1 << state_to for state_to in set(states_to)))
+        initial_mask = close(sum(1 << state for state in set(interned.initial_states)))
+        final_mask = sum(1 << state for state in interned.final_states)
+        return cls(symbols=tuple(interned.labels), successors=successors, n_states=n_states,
+                   initial_mask=initial_mask, final_mask=final_mask)
+
+
+_NON_ZERO_BYTE = re.compile(b'[^\\x00]')
@@ -1,8 +1,12 @@
-import collections
+import builtins
 from itertools import count
-from typing import Dict, Set, Union, Hashable
+from typing import Dict, Set, Union, Hashable, Iterable, List, Optional, Tuple
 
+from .compiled import CompiledDFA, DEAD, column_classes, select_columns
 from .fsm import FSM
+from .interned import InternedFSM
+from .profiling import phase
+from .search import Searcher
 from .state import State
 from .transition import Transition
 
@@ -19,10 +23,11 @@ class DeterministicFSM(FSM):
         :param initial_states:
         :param final_states:
         """
-        self._check_dfsm(fsm, allow_none=True)
         super().__init__(fsm=fsm, initial_states=initial_states, final_states=final_states)
 
     def add_transition(self, state_from: State, transition: Transition, state_to: State) -> bool:
+        if self._reverse_index is not None:
+            return self._indexed_update(DeterministicFSM.add_transition, state_from, transition, state_to)
         if transition.is_epsilon():
             raise ValueError('Epsilon transitions are forbidden in a DeterministicFSM')
         self._check_state(state_from, allow_none=False)
@@ -49,6 +54,213 @@ class DeterministicFSM(FSM):
                            states_to: Set[State]) -> NotImplementedError:
         raise NotImplementedError()
 
+    def run(self, word: Iterable[Hashable]) -> Optional[State]:
+        """
+        Returns the state reached after reading `word` from the initial state (None if the run gets stuck).
+        """
+
+        if len(self._initial_states) > 1:
+            raise ValueError('DeterministicFSM.run requires a single initial state; use FSM.run or accepts')
+        fsm = self._fsm
+        transitions_by_symbol = dict()
+        state = next(iter(self._initial_states), None)
+        for symbol in word:
+            if state is None:
+                return None
+            transition = transitions_by_symbol.get(symbol)
+            if transition is None:
+                transition = transitions_by_symbol[symbol] = Transition(symbol)
+            transitions = fsm.get(state)
+            state = transitions.get(transition) if transitions is not None else None
+        return state
+
+    def accepts(self, word: Iterable[Hashable]) -> bool:
+        if len(self._initial_states) > 1:
+            return super().accepts(word)
+        state = self.run(word)
+        return state is not None and state in self._final_states
+
+    def compile(self) -> CompiledDFA:
+        """
+        Returns an immutable integer transition table (see CompiledDFA) for fast repeated matching.
+        """
+
+        return CompiledDFA.from_fsm(self)
+
+    def searcher(self) -> Searcher:
+        """
+        Compiled forward and reverse tables for unanchored search (see Searcher). Building them compiles the DFA
+        and determinizes its reversal; the DFA may be modified afterwards, so they are not cached: keep the
+        Searcher to search many texts, e.g. `searcher = dfsm.searcher()` then `searcher.search(line)` per line.
+        """
+
+        return Searcher(self.compile())
+
+    def search(self, text, longest=True):
+        """
+        Span (start, end) of the leftmost substring text[start:end] in the language (leftmost-longest, or with
+        longest=False the leftmost with the first end reached), None if there is none.
+        One-shot: the search tables are built on every call; use searcher() to search several texts.
+        """
+
+        return self.searcher().search(text, longest)
+
+    def finditer(self, text, longest=True):
+        """
+        Iterator over the (start, end) spans of the successive non-overlapping matches (see search).
+        One-shot like search; use searcher().finditer to search several texts.
+        """
+
+        return self.searcher().finditer(text, longest)
+
+    def fullmatch(self, text):
+        """
+        Span (0, n) if the whole text is in the language, n being the number of symbols read, None otherwise.
+        Any iterable is accepted (read once, like accepts).
+        """
+
+        length = 0
+
+        def counted(symbols):
+            nonlocal length
+            for symbol in symbols:
+                length += 1
+                yield symbol
+
+        return (0, length) if self.accepts(counted(text)) else None
+
+    def save(self, path) -> None:
+        """
+        Compiles and writes the binary image of the DFA (see CompiledDFA.save); read it with CompiledDFA.load.
+        """
+
+        self.compile().save(path)
+
+    def canonical(self):
+        """
+        Canonical form of the reachable part: states are renamed '1', '2', ... in BFS order from the initial state,
+        following transitions in sorted-label order (see CompiledDFA.canonical).
+        Isomorphic DFAs give equal results; use dfsm.minimize().canonical() to compare up to language.
+        """
+
+        return DeterministicFSM.from_compiled(self.compile().canonical())
+
+    def fingerprint(self) -> str:
+        """
+        Stable content hash of the canonical integer table (see CompiledDFA.fingerprint).
+        """
+
+        return self.compile().fingerprint()
+
+    def intersection(self, other, minimize=False):
+        return self._product(other, lambda x, y: x and y, minimize)
+
+    def union(self, other, minimize=False):
+        return self._product(other, lambda x, y: x or y, minimize)
+
+    def difference(self, other, minimize=False):
+        return self._product(other, lambda x, y: x and not y, minimize)
+
+    def symmetric_difference(self, other, minimize=False):
+        return self._product(other, lambda x, y: x != y, minimize)
+
+    def equivalent(self, other, counterexample=False):
+        """
+        Language equivalence by the Hopcroft-Karp union-find algorithm (near-linear, no minimization).
+        With counterexample=True returns (result, word) where word is a tuple of labels accepted by exactly
+        one of the automata (None if they are equivalent).
+        """
+
+        self._check_fsm_class(other)
+        first, second = self.compile(), other.compile()
+        word = _hopcroft_karp(*_compiled_runner(first, second.symbols), *_compiled_runner(second, first.symbols))
+        return (word is None, word) if counterexample else word is None
+
+    def is_subset_of(self, other, counterexample=False):
+        """
+        Language inclusion of DFAs: L(A) is a subset of L(B) iff A ∪ B is equivalent to B, which is checked by
+        Hopcroft-Karp on the implicit (never materialized) union automaton.
+        With counterexample=True returns (result, word) where word is accepted by self but not by other.
+        """
+
+        if not isinstance(other, DeterministicFSM):
+            return super().is_subset_of(other, counterexample)
+        first, second = self.compile(), other.compile()
+        start1, step1, is_final1, symbols = _compiled_runner(first, second.symbols)
+        start2, step2, is_final2, symbols2 = _compiled_runner(second, first.symbols)
+        columns2 = {symbol: i for i, symbol in enumerate(symbols2)}
+        columns2 = [columns2[symbol] for symbol in symbols]
+
+        def union_step(pair, symbol):
+            return step1(pair[0], symbol), step2(pair[1], columns2[symbol])
+
+        def union_is_final(pair):
+            return is_final1(pair[0]) or is_final2(pair[1])
+
+        word = _hopcroft_karp((start1, start2), union_step, union_is_final, symbols, start2, step2, is_final2, symbols2)
+        return (word is None, word) if counterexample else word is None
+
+    def _product(self, other, is_final, minimize):
+        """
+        Product construction over the union of both alphabets, restricted to the pairs reachable from the pair
+        of initial states (a streaming BFS; pairs are indexed by p * (n2 + 1) + q and missing edges lead to
+        an implicit dead state). Pairs that can never be final under `is_final` are not expanded.
+        """
+
+        self._check_fsm_class(other)
+        first = self.compile()
+        second = other.compile()
+        symbols = tuple(dict.fromkeys(first.symbols + second.symbols))
+        n1, n2 = first.n_states, second.n_states
+        dead1, dead2 = n1, n2
+        columns1 = [first._symbol_index.get(symbol) for symbol in symbols]
+        columns2 = [second._symbol_index.get(symbol) for symbol in symbols]
+        table1, table2 = first._table, second._table
+        width1, width2 = first.n_symbols, second.n_symbols
+        final_flags1 = first._final_flags + b'\x00'
+        final_flags2 = second._final_flags + b'\x00'
+        # whether a pair can still reach a final pair, by which of its components are dead
+        alive = {(dead_p, dead_q): any(is_final(x, y) for x in ((False,) if dead_p else (False, True))
+                                       for y in ((False,) if dead_q else (False, True)))
+                 for dead_p in (False, True) for dead_q in (False, True)}
+
+        def is_alive(p, q):
+            return alive[p == dead1, q == dead2]
+
+        p0 = dead1 if first.initial_state == DEAD else first.initial_state
+        q0 = dead2 if second.initial_state == DEAD else second.initial_state
+        if not is_alive(p0, q0):
+            return DeterministicFSM._adopt(dict(), set(), set())
+        pair_ids = {p0 * (n2 + 1) + q0: 0}
+        pairs = [(p0, q0)]
+        rows = []
+        for p, q in pairs:
+            row = []
+            for symbol, (column1, column2) in enumerate(zip(columns1, columns2)):
+                p_to = table1[p * width1 + column1] if p != dead1 and column1 is not None else DEAD
+                q_to = table2[q * width2 + column2] if q != dead2 and column2 is not None else DEAD
+                p_to = dead1 if p_to == DEAD else p_to
+                q_to = dead2 if q_to == DEAD else q_to
+                if not is_alive(p_to, q_to):
+                    continue
+                key = p_to * (n2 + 1) + q_to
+                pair_id = pair_ids.get(key)
+                if pair_id is None:
+                    pair_id = pair_ids[key] = len(pairs)
+                    pairs.append((p_to, q_to))
+                row.append((symbol, pair_id))
+            rows.append(row)
+
+        name_of_state_generator = map(str, count(1, 1))
+        new_states = [State._trusted(next(name_of_state_generator)) for _ in pairs]
+        transitions = [Transition._trusted(symbol) for symbol in symbols]
+        new_fsm = {new_states[i]: {transitions[symbol]: new_states[pair_id] for symbol, pair_id in row}
+                   for i, row in enumerate(rows)}
+        new_final_states = {new_states[i] for i, (p, q) in enumerate(pairs)
+                            if is_final(bool(final_flags1[p]), bool(final_flags2[q]))}
+        product = DeterministicFSM._adopt(new_fsm, {new_states[0]}, new_final_states)
+        return product.minimize() if minimize else product
+
     def minimize(self, name_of_state_generator=...):
         """
         Hopcroft's algorithm for minimizing a finite state machine.
@@ -61,107 +273,91 @@ class DeterministicFSM(FSM):
                 raise RuntimeError('Generator must have __iter__ method')
             name_of_state_generator = iter(name_of_state_generator)
 
-        fsm = self.fsm_deepcopy()
-        initial_states = self.initial_states_deepcopy()
-        final_states = self.final_states_deepcopy()
-        alphabet = self.alphabet()
-
-        fictive_state = State('fictive_state')
-        while fictive_state in self._fsm:
-            fictive_state.uid += "'"
-        fictive_alpha = Transition('fictive_alpha')
-        while fictive_alpha in alphabet:
-            fictive_alpha.label += "'"
-        fsm[fictive_state] = {fictive_alpha: initial_states}
-        initial_states = {fictive_state}
-        alphabet.add(fictive_alpha)
-        dfsm_obj = DeterministicFSM.from_original(fsm, initial_states, final_states, name_of_state_generator=None)
-        fsm, initial_states, final_states = dfsm_obj._fsm, dfsm_obj._initial_states, dfsm_obj._final_states
-
-        inversed_fsm = dict()
-        for state, transitions in fsm.items():
-            inversed_fsm.setdefault(state, dict())
-            for transition, state_to in transitions.items():
-                if isinstance(state_to, State):
-                    state_to = {state_to}
-                for alpha_state in state_to:
-                    inversed_fsm.setdefault(alpha_state, dict()).setdefault(transition, set()).add(state)
-        only_final_states = frozenset(final_states)
-        without_final_states = frozenset(fsm).difference(final_states.union({fictive_state}))
-        classes = {frozenset({fictive_state}), only_final_states, without_final_states}
-        q = classes.copy()
-        while q:
-            some_class = q.pop()
-            for alpha in alphabet:
-                path_sources = set()
-                for state in some_class:
-                    if state in inversed_fsm and alpha in inversed_fsm[state]:
-                        path_sources.update(inversed_fsm[state][alpha])
-                for class_to_split in classes.copy():
-                    p_with_class = class_to_split.intersection(path_sources)
-                    if p_with_class:
-                        p_without_class = class_to_split.difference(path_sources)
-                        if p_without_class:
-                            classes.remove(class_to_split)
-                            classes.add(p_with_class)
-                            classes.add(p_without_class)
-                            if class_to_split in q:
-                                q.remove(class_to_split)
-                                q.add(p_with_class)
-                                q.add(p_without_class)
-                            else:
-                                if len(p_with_class) <= len(p_without_class):
-                                    q.add(p_with_class)
-                                else:
-                                    q.add(p_without_class)
+        if len(self._initial_states) == 1:
+            states, symbols, delta = _reachable_part(self)
+            final_states = frozenset(i for i, state in enumerate(states) if state in self._final_states)
+            initial_states = {0}
+            fictive = None
+        else:
+            # the language of several initial states is their union, whose minimal DFA needs a subset
+            # construction: a fictive state leading to all of them is determinized first
+            alphabet = self.alphabet()
+            fictive_state = State('fictive_state')
+            while fictive_state in self._fsm:
+                fictive_state.uid += "'"
+            fictive_alpha = Transition('fictive_alpha')
+            while fictive_alpha in alphabet:
+                fictive_alpha.label += "'"
+            fsm = dict(self._fsm)
+            fsm[fictive_state] = {fictive_alpha: set(self._initial_states)}
+            dfsm_obj = DeterministicFSM.from_fsm(FSM._adopt(fsm, {fictive_state}, self._final_states), None)
+            interned = InternedFSM(dfsm_obj)
+            states = interned.states
+            symbols = interned.symbols
+            delta = interned.delta
+            fictive = interned.state_index[fictive_state]
+            final_states = frozenset(interned.final_states)
+            initial_states = set(delta[fictive].get(interned.symbol_index.get(fictive_alpha), ()))
+
+        # complete the transition function with a sink state kept in its own block,
+        # so a missing transition stays distinguishable from any existing one
+        n_states = len(states)
+        n_symbols = len(symbols)
+        sink = n_states
+        table = [sink] * ((n_states + 1) * n_symbols)
+        for state, transitions in enumerate(delta):
+            row = state * n_symbols
+            for symbol, (state_to,) in transitions.items():
+                table[row + symbol] = state_to
+        # symbols with equal transitions in every state split the same blocks: refine by one symbol per class
+        _, representatives = column_classes(table, n_symbols)
+        if len(representatives) < n_symbols:
+            table = select_columns(table, n_states + 1, n_symbols, representatives)
+        without_final_states = set(range(n_states)).difference(final_states)
+        without_final_states.discard(fictive)
+        blocks = [[sink], [fictive] if fictive is not None else [], sorted(final_states), sorted(without_final_states)]
+        with phase('minimize.refine') as profiled:
+            classes = _refine_partition(n_states + 1, len(representatives), table, [block for block in blocks if block],
+                                        profiled)
+        classes = [frozenset(some_class) for some_class in classes
+                   if fictive not in some_class and sink not in some_class]
+        return self._from_classes(classes, delta, states, symbols, initial_states, final_states,
+                                  name_of_state_generator)
+
+    @classmethod
+    def _from_classes(cls, classes, delta, states, symbols, initial_states, final_states, name_of_state_generator):
+        """
+        Builds the quotient DFA of interned states by classes of equivalent states.
+        Classes are named initial first, then non-final, then final ones.
+        """
+
+        initial_classes = [some_class for some_class in classes if not initial_states.isdisjoint(some_class)]
+        other_classes = [some_class for some_class in classes if initial_states.isdisjoint(some_class)]
+        ordered_classes = initial_classes + \
+            [some_class for some_class in other_classes if final_states.isdisjoint(some_class)] + \
+            [some_class for some_class in other_classes if not final_states.isdisjoint(some_class)]
         new_states = dict()
-        new_initial_states = set()
-        new_final_states = set()
-        new_non_initial_classes = set()
-        initial_states = fsm[fictive_state][fictive_alpha] if fictive_alpha in fsm[fictive_state] else set()
-        initial_states = {initial_states} if isinstance(initial_states, State) else initial_states
-        classes = {some_class for some_class in classes if bool(some_class) and fictive_state not in some_class}
-        for some_class in classes:
-            if not initial_states.isdisjoint(some_class):
-                if name_of_state_generator is None:
-                    n_class_str = some_class
-                else:
-                    n_class_str = next(name_of_state_generator)
-                new_initial_states.add(State(n_class_str))
-                for state in some_class:
-                    new_states[state] = n_class_str
-                if not final_states.isdisjoint(some_class):
-                    new_final_states.add(State(n_class_str))
-            else:
-                new_non_initial_classes.add(some_class)
-        new_final_classes = set()
-        for some_class in new_non_initial_classes:
-            if final_states.isdisjoint(some_class):
-                if name_of_state_generator is None:
-                    n_class_str = some_class
-                else:
-                    n_class_str = next(name_of_state_generator)
-                for state in some_class:
-                    new_states[state] = n_class_str
-            else:
-                new_final_classes.add(some_class)
-        for some_class in new_final_classes:
+        class_states = []
+        for some_class in ordered_classes:
             if name_of_state_generator is None:
-                n_class_str = some_class
+                class_state = State._trusted(frozenset(states[state] for state in some_class))
             else:
-                n_class_str = next(name_of_state_generator)
-            new_final_states.add(State(n_class_str))
+                class_state = State(next(name_of_state_generator))
+            class_states.append(class_state)
             for state in some_class:
-                new_states[state] = n_class_str
+                new_states[state] = class_state
         new_fsm = dict()
-        for some_class in classes:
+        new_final_states = set()
+        for some_class, class_state in zip(ordered_classes, class_states):
             new_state = dict()
             for state in some_class:
-                for alpha, alpha_state in fsm[state].items():
-                    new_state[alpha] = State(new_states[alpha_state])
-            any_state = next(iter(some_class))
-            new_fsm[State(new_states[any_state])] = new_state
-        return DeterministicFSM(fsm=new_fsm, initial_states=new_initial_states, final_states=new_final_states)
+                for symbol, (state_to,) in delta[state].items():
+                    new_state[symbols[symbol]] = new_states[state_to]
+            new_fsm[class_state] = new_state
+            if not final_states.isdisjoint(some_class):
+                new_final_states.add(class_state)
+        new_initial_states = set(class_states[:len(initial_classes)])
+        return DeterministicFSM._adopt(new_fsm, new_initial_states, new_final_states)
 
     def _brzozowski(self, name_of_state_generator=...):
         """
@@ -170,7 +366,7 @@ class DeterministicFSM(FSM):
         Therefore, this algorithm in such cases has a different result compared to Hopcroft's algorithm.
         """
 
-        dfsm_obj = DeterministicFSM(fsm=self._fsm, initial_states=self._initial_states, final_states=self._final_states)
+        dfsm_obj = self
         alphabet = dfsm_obj.alphabet()
 
         def add_initial_fictive_state(fsm_alphabet, fsm_obj):
@@ -196,7 +392,9 @@ class DeterministicFSM(FSM):
         final_states_empty = not bool(dfsm_obj._final_states)
 
         # 1. r(A)
-        inv_fsm_obj = dfsm_obj.reverse()
+        with phase('brzozowski.reverse_1') as profiled:
+            inv_fsm_obj = dfsm_obj.reverse()
+            profiled.set(states=len(inv_fsm_obj._fsm))
         if final_states_empty:
             inv_fsm_obj.set_initial_states(inv_fsm_obj.get_states())
 
@@ -204,7 +402,9 @@ class DeterministicFSM(FSM):
         fictive_state, fictive_alpha = add_initial_fictive_state(alphabet, inv_fsm_obj)
 
         # 2. d(r(A))
-        d_inv_fsm_obj = DeterministicFSM.from_fsm(inv_fsm_obj, None)
+        with phase('brzozowski.determinize_1') as profiled:
+            d_inv_fsm_obj = DeterministicFSM.from_fsm(inv_fsm_obj, None)
+            profiled.set(states=len(d_inv_fsm_obj._fsm))
 
         # remove initial fictive state
         remove_initial_fictive_state(alphabet, d_inv_fsm_obj, fictive_state, fictive_alpha)
@@ -212,13 +412,17 @@ class DeterministicFSM(FSM):
             d_inv_fsm_obj._initial_states.clear()
 
         # 3. r(d(r(A)))
-        inv_fsm_obj = d_inv_fsm_obj.reverse()
+        with phase('brzozowski.reverse_2') as profiled:
+            inv_fsm_obj = d_inv_fsm_obj.reverse()
+            profiled.set(states=len(inv_fsm_obj._fsm))
 
         # --- add initial fictive state
         fictive_state, fictive_alpha = add_initial_fictive_state(alphabet, inv_fsm_obj)
 
         # 4. d(r(d(r(A))))
-        d_inv_fsm_obj = DeterministicFSM.from_fsm(inv_fsm_obj, None)
+        with phase('brzozowski.determinize_2') as profiled:
+            d_inv_fsm_obj = DeterministicFSM.from_fsm(inv_fsm_obj, None)
+            profiled.set(states=len(d_inv_fsm_obj._fsm))
 
         # remove initial fictive state
         remove_initial_fictive_state(alphabet, d_inv_fsm_obj, fictive_state, fictive_alpha)
@@ -232,6 +436,88 @@ class DeterministicFSM(FSM):
         fsm_obj = super().from_original(fsm, initial_states, final_states)
         return cls.from_fsm(fsm_obj, name_of_state_generator)
 
+    @classmethod
+    def from_words(cls, words: Iterable[Iterable[Hashable]], sorted: bool = True, name_of_state_generator=...):
+        """
+        Minimal DFA of a finite set of words (strings or sequences of labels) by Daciuk's incremental algorithm.
+        Words are streamed in sorted order; after each word the states of the previous word's path that are no
+        longer shared are merged into a register of equivalent states, so memory stays proportional to the
+        minimal DFA (plus one word). With sorted=False the words are sorted first, which keeps all of them in memory.
+        """
+
+        if name_of_state_generator is ...:
+            name_of_state_generator = map(str, count(1, 1))
+        if name_of_state_generator is not None:
+            if not hasattr(name_of_state_generator, '__iter__'):
+                raise RuntimeError('Generator must have __iter__ method')
+            name_of_state_generator = iter(name_of_state_generator)
+        if not sorted:
+            words = builtins.sorted(set(map(tuple, words)))
+
+        # states are ints; delta[state] maps labels to states, in increasing label order
+        delta: Dict[int, Dict[Hashable, int]] = {0: dict()}
+        final_states: Set[int] = set()
+        register: Dict[tuple, int] = dict()
+        new_ids = count(1)
+
+        def replace_or_register(path, labels, depth):
+            # merges the states path[depth + 1:] (deepest first) with equivalent registered states
+            for i in range(len(path) - 1, depth, -1):
+                state = path[i]
+                signature = (state in final_states, tuple(delta[state].items()))
+                registered = register.get(signature)
+                if registered is None:
+                    register[signature] = state
+                else:
+                    delta[path[i - 1]][labels[i - 1]] = registered
+                    del delta[state]
+                    final_states.discard(state)
+            del path[depth + 1:]
+
+        previous = None
+        path = [0]
+        for word in words:
+            if not isinstance(word, (str, bytes, tuple, list)):
+                word = tuple(word)
+            if previous is not None:
+                if word < previous:
+                    raise ValueError(f'{cls.__name__}. Words are not sorted: {word!r} follows {previous!r}; '
+                                     f'use sorted=False')
+                if word == previous:
+                    continue
+            depth = 0
+            if previous is not None:
+                for x, y in zip(word, previous):
+                    if x != y:
+                        break
+                    depth += 1
+                replace_or_register(path, previous, depth)
+            for label in word[depth:]:
+                state = next(new_ids)
+                delta[state] = dict()
+                delta[path[-1]][label] = state
+                path.append(state)
+            final_states.add(path[-1])
+            previous = word
+        if previous is not None:
+            replace_or_register(path, previous, 0)
+
+        order = [0]
+        new_states = {0: None}
+        for state in order:
+            for state_to in delta[state].values():
+                if state_to not in new_states:
+                    new_states[state_to] = None
+                    order.append(state_to)
+        for state in order:
+            new_states[state] = State._trusted(state) if name_of_state_generator is None \
+                else State(next(name_of_state_generator))
+        transitions = {label: Transition(label) for label in {label for state in order for label in delta[state]}}
+        new_fsm = {new_states[state]: {transitions[label]: new_states[state_to]
+                                       for label, state_to in delta[state].items()}
+                   for state in order}
+        return DeterministicFSM._adopt(new_fsm, {new_states[0]}, {new_states[state] for state in final_states})
+
     @classmethod
     def from_fsm(cls, fsm_obj: FSM, name_of_state_generator=...):
         if name_of_state_generator is ...:
@@ -242,82 +528,94 @@ class DeterministicFSM(FSM):
             name_of_state_generator = iter(name_of_state_generator)
 
         fsm_obj = fsm_obj.eliminate_epsilon_transitions()
-        fsm = fsm_obj.fsm_deepcopy()
-        initial_states = fsm_obj.initial_states_deepcopy()
-        final_states = fsm_obj.final_states_deepcopy()
+        if not fsm_obj._fsm or not fsm_obj._initial_states:
+            return DeterministicFSM._adopt(dict(), set(), set())
+
+        with phase('from_fsm.subset_construction') as profiled:
+            # subset construction over sorted tuples of interned states; most subsets of a typical NFA are
+            # singletons, whose rows are the precomputed successor tuples
+            interned = InternedFSM(fsm_obj)
+            successors = [{symbol: tuple(sorted(set(states_to))) for symbol, states_to in transitions.items()}
+                          for transitions in interned.delta]
+            is_final = [False] * len(interned)
+            for state in interned.final_states:
+                is_final[state] = True
+            subsets = [(state,) for state in dict.fromkeys(interned.initial_states)]
+            n_initial_states = len(subsets)
+            subset_ids = {subset: i for i, subset in enumerate(subsets)}
+            rows = []
+            for subset in subsets:
+                if len(subset) == 1:
+                    transitions = successors[subset[0]]
+                else:
+                    merged = dict()
+                    for state in subset:
+                        for symbol, states_to in successors[state].items():
+                            targets = merged.get(symbol)
+                            if targets is None:
+                                merged[symbol] = set(states_to)
+                            else:
+                                targets.update(states_to)
+                    transitions = {symbol: tuple(sorted(targets)) for symbol, targets in merged.items()}
+                row = dict()
+                for symbol, subset_to in transitions.items():
+                    if not subset_to:
+                        continue
+                    subset_id = subset_ids.get(subset_to)
+                    if subset_id is None:
+                        subset_id = subset_ids[subset_to] = len(subsets)
+                        subsets.append(subset_to)
+                    row[symbol] = subset_id
+                rows.append(row)
+            if profiled:
+                profiled.set(nfa_states=len(interned), dfa_states=len(subsets), transitions=sum(map(len, rows)),
+                             peak_subset_size=max(map(len, subsets)))
+
+        if name_of_state_generator is None:
+            new_states = [interned.states[subset[0]] if len(subset) == 1
+                          else State._trusted(frozenset(interned.states[i] for i in subset)) for subset in subsets]
+        else:
+            new_states = [State(next(name_of_state_generator)) for _ in subsets]
+        symbols = interned.symbols
+        new_fsm = {new_states[i]: {symbols[symbol]: new_states[subset_id] for symbol, subset_id in row.items()}
+                   for i, row in enumerate(rows)}
+        new_initial_states = set(new_states[:n_initial_states])
+        new_final_states = {new_states[i] for i, subset in enumerate(subsets)
+                            if any(is_final[state] for state in subset)}
+        return DeterministicFSM._adopt(new_fsm, new_initial_states, new_final_states)
 
-        if not fsm or not initial_states:
-            return DeterministicFSM(fsm=dict(), initial_states=set(), final_states=set())
+    @classmethod
+    def from_compiled(cls, compiled: CompiledDFA, name_of_state_generator=...):
+        """
+        Builds State/Transition objects for a CompiledDFA; with name_of_state_generator=None states are named
+        by their int ids.
+        """
 
-        new_fsm = {initial_state: dict() for initial_state in initial_states}
-        new_initial_states = initial_states.copy()
-        new_final_states = set()
-        q: collections.deque = collections.deque(initial_states)
-        seen = set()
-        while q:
-            state_from = q.popleft()
-            if state_from in seen:
-                continue
-            seen.add(state_from)
-            if isinstance(state_from, State):
-                if state_from in final_states:
-                    new_final_states.add(state_from)
-                for transition, state_or_set_of_states in fsm.get(state_from, dict()).items():
-                    if isinstance(state_or_set_of_states, (set, frozenset)) and len(state_or_set_of_states) == 1:
-                        state_or_set_of_states = next(iter(state_or_set_of_states))
-                    if isinstance(state_or_set_of_states, (set, frozenset)) and len(state_or_set_of_states) > 1:
-                        is_final_state = bool(state_or_set_of_states.intersection(final_states))
-                        new_state_frozenset = frozenset(state_or_set_of_states)
-                        new_state = State(new_state_frozenset)
-                        new_fsm.setdefault(state_from, dict())[transition] = new_state
-                        new_fsm.setdefault(new_state, dict())
-                        if is_final_state:
-                            new_final_states.add(new_state)
-                        q.append(new_state_frozenset)
-                    elif isinstance(state_or_set_of_states, State):
-                        new_fsm.setdefault(state_from, dict())[transition] = state_or_set_of_states
-                        new_fsm.setdefault(state_or_set_of_states, dict())
-                        q.append(state_or_set_of_states)
-            elif isinstance(state_from, (set, frozenset)):
-                states = frozenset(state_from)
-                state_of_old_states = State(states)
-                if not states.isdisjoint(final_states) or state_of_old_states in final_states:
-                    new_final_states.add(state_of_old_states)
-                transitions = dict()
-                for old_state_to in states:
-                    for transition, state_or_set_of_states in fsm.get(old_state_to, dict()).items():
-                        if isinstance(state_or_set_of_states, (set, frozenset)):
-                            transitions.setdefault(transition, set()).update(state_or_set_of_states)
-                        elif isinstance(state_or_set_of_states, State):
-                            transitions.setdefault(transition, set()).add(state_or_set_of_states)
-                for transition, set_of_states in transitions.items():
-                    if len(set_of_states) > 1:
-                        new_state_frozenset = frozenset(set_of_states)
-                        new_state = State(new_state_frozenset)
-                        new_fsm.setdefault(state_of_old_states, dict())[transition] = new_state
-                        new_fsm.setdefault(new_state, dict())
-                        q.append(new_state_frozenset)
-                    elif len(set_of_states) == 1:
-                        new_state = next(iter(set_of_states))
-                        new_fsm.setdefault(state_of_old_states, dict())[transition] = new_state
-                        new_fsm.setdefault(new_state, dict())
-                        q.append(new_state)
-        new_initial_states.intersection_update(new_fsm)
-        new_final_states.intersection_update(new_fsm)
-        if name_of_state_generator is not None:
-            all_states = {state: State(next(name_of_state_generator)) for state in new_initial_states}
-            all_states.update({state: State(next(name_of_state_generator))
-                               for state in set(new_fsm).difference(all_states)})
-            new_fsm = {
-                all_states[state_from]: {
-                    transition: all_states[state_to]
-                    for transition, state_to in transitions.items()
-                }
-                for state_from, transitions in new_fsm.items()
-            }
-            new_initial_states = set(map(all_states.get, new_initial_states))
-            new_final_states = set(map(all_states.get, new_final_states))
-        return DeterministicFSM(fsm=new_fsm, initial_states=new_initial_states, final_states=new_final_states)
+        if name_of_state_generator is ...:
+            name_of_state_generator = map(str, count(1, 1))
+        if name_of_state_generator is None:
+            states = [State._trusted(i) for i in range(compiled.n_states)]
+        else:
+            if not hasattr(name_of_state_generator, '__iter__'):
+                raise RuntimeError('Generator must have __iter__ method')
+            name_of_state_generator = iter(name_of_state_generator)
+            states = [State(next(name_of_state_generator)) for _ in range(compiled.n_states)]
+        symbols = [Transition(symbol) for symbol in compiled.symbols]
+        table = compiled._table
+        n_symbols = len(symbols)
+        new_fsm = {state: {symbols[column]: states[state_to]
+                           for column, state_to in enumerate(table[i * n_symbols:(i + 1) * n_symbols])
+                           if state_to != DEAD}
+                   for i, state in enumerate(states)}
+        new_initial_states = {states[compiled.initial_state]} if compiled.initial_state != DEAD else set()
+        new_final_states = {states[i] for i in compiled.final_states}
+        return DeterministicFSM._adopt(new_fsm, new_initial_states, new_final_states)
+
+    @classmethod
+    def _check_arguments(cls, fsm: Dict[State, Dict[Transition, Union[State, Set[State]]]],
+                         initial_states: Set[State], final_states: Set[State]):
+        cls._check_dfsm(fsm, allow_none=True)
+        super()._check_arguments(fsm, initial_states, final_states)
 
     @classmethod
     def _check_dfsm(cls, fsm: Dict[State, Dict[Transition, Union[State, Set[State]]]], *, allow_none):
@@ -328,3 +626,205 @@ class DeterministicFSM(FSM):
                 isinstance(t, Transition) and isinstance(s, State) for t, s in v.items()) for k, v in fsm.items())):
             raise TypeError(f'{cls_name}. Argument must be None or '
                             f'Dict[State, Dict[Transition, Union[State, Set[State]]]]; got: {type(fsm)}')
+
+
+def _reachable_part(dfsm_obj: DeterministicFSM) -> Tuple[List[State], List[Transition], List[Dict[int, Tuple[int]]]]:
+    """
+    Numbers the states reachable from the single initial state in BFS order (the initial state is 0) and the
+    labels in order of appearance; returns (states, symbols, delta) in the InternedFSM layout, with
+    delta[state][symbol] = (state_to,).
+    """
+
+    fsm = dfsm_obj._fsm
+    states = list(dfsm_obj._initial_states)
+    state_index = {states[0]: 0}
+    symbols = []
+    symbol_index = dict()
+    delta = []
+    no_transitions = dict()
+    for state in states:
+        transitions = dict()
+        for transition, state_to in fsm.get(state, no_transitions).items():
+            symbol = symbol_index.get(transition)
+            if symbol is None:
+                symbol = symbol_index[transition] = len(symbols)
+                symbols.append(transition)
+            state_to_index = state_index.get(state_to)
+            if state_to_index is None:
+                state_to_index = state_index[state_to] = len(states)
+                states.append(state_to)
+            transitions[symbol] = (state_to_index,)
+        delta.append(transitions)
+    return states, symbols, delta
+
+
+def _refine_partition(n_states: int, n_symbols: int, table: List[int], blocks: List[List[int]],
+                      profiled=None) -> List[List[int]]:
+    """
+    Hopcroft's partition refinement in O(n_symbols * n_states * log(n_states)).
+    Returns the coarsest partition refining `blocks` that is stable under the complete transition function
+    table[state * n_symbols + symbol]. Blocks are ranges of one permutation array; a split moves the marked
+    predecessors to the front of their block and only the smaller half of a split (block, symbol) pair
+    joins the worklist unless the pair was already waiting.
+    Counters (states, symbols, splitters processed, splits, peak worklist size, blocks) go to `profiled`.
+    """
+
+    # inverse transitions per symbol in compressed rows: sources[a][offsets[a][t]:offsets[a][t + 1]]
+    inverse_offsets = []
+    inverse_sources = []
+    for symbol in range(n_symbols):
+        offsets = [0] * (n_states + 1)
+        for state in range(n_states):
+            offsets[table[state * n_symbols + symbol] + 1] += 1
+        for state in range(n_states):
+            offsets[state + 1] += offsets[state]
+        sources = [0] * n_states
+        positions = offsets[:-1]
+        for state in range(n_states):
+            state_to = table[state * n_symbols + symbol]
+            sources[positions[state_to]] = state
+            positions[state_to] += 1
+        inverse_offsets.append(offsets)
+        inverse_sources.append(sources)
+
+    elements = []
+    location = [0] * n_states
+    block_of = [0] * n_states
+    first = []
+    end = []
+    for block, members in enumerate(blocks):
+        first.append(len(elements))
+        for state in members:
+            location[state] = len(elements)
+            block_of[state] = block
+            elements.append(state)
+        end.append(len(elements))
+    marked = [0] * len(blocks)
+    waiting = [bytearray(b'\x01' * n_symbols) for _ in blocks]
+    worklist = [(block, symbol) for block in range(len(blocks)) for symbol in range(n_symbols)]
+    n_splitters = 0
+    peak_worklist = len(worklist)
+
+    while worklist:
+        if profiled and len(worklist) > peak_worklist:
+            peak_worklist = len(worklist)
+        n_splitters += 1
+        splitter, symbol = worklist.pop()
+        waiting[splitter][symbol] = 0
+        offsets = inverse_offsets[symbol]
+        sources = inverse_sources[symbol]
+        touched = []
+        for state_to in elements[first[splitter]:end[splitter]]:
+            for state in sources[offsets[state_to]:offsets[state_to + 1]]:
+                block = block_of[state]
+                count_marked = marked[block]
+                if not count_marked:
+                    touched.append(block)
+                position = location[state]
+                target = first[block] + count_marked
+                other = elements[target]
+                elements[target] = state
+                location[state] = target
+                elements[position] = other
+                location[other] = position
+                marked[block] = count_marked + 1
+        for block in touched:
+            count_marked = marked[block]
+            marked[block] = 0
+            size = end[block] - first[block]
+            if count_marked == size:
+                continue
+            new_block = len(first)
+            first.append(first[block])
+            end.append(first[block] + count_marked)
+            first[block] += count_marked
+            marked.append(0)
+            for position in range(first[new_block], end[new_block]):
+                block_of[elements[position]] = new_block
+            old_waiting = waiting[block]
+            new_waiting = bytearray(n_symbols)
+            waiting.append(new_waiting)
+            smaller = new_block if count_marked <= size - count_marked else block
+            for c in range(n_symbols):
+                if old_waiting[c]:
+                    new_waiting[c] = 1
+                    worklist.append((new_block, c))
+                elif not waiting[smaller][c]:
+                    waiting[smaller][c] = 1
+                    worklist.append((smaller, c))
+    if profiled:
+        profiled.set(states=n_states, symbols=n_symbols, splitters=n_splitters, splits=len(first) - len(blocks),
+                     peak_worklist=peak_worklist, blocks=len(first))
+    return [elements[first[block]:end[block]] for block in range(len(first))]
+
+
+def _compiled_runner(compiled: CompiledDFA, extra_symbols):
+    """
+    (initial state, step, is_final, symbols) of a compiled DFA over its alphabet extended by `extra_symbols`;
+    symbols are column indexes into the extended alphabet and DEAD is an ordinary non-final state.
+    """
+
+    symbols = tuple(dict.fromkeys(compiled.symbols + tuple(extra_symbols)))
+    columns = [compiled._symbol_index.get(symbol) for symbol in symbols]
+    table = compiled._table
+    width = compiled.n_symbols
+    final_flags = compiled._final_flags
+
+    def step(state, symbol):
+        column = columns[symbol]
+        if state == DEAD or column is None:
+            return DEAD
+        return table[state * width + column]
+
+    def is_final(state):
+        return state != DEAD and bool(final_flags[state])
+
+    return compiled.initial_state, step, is_final, symbols
+
+
+def _hopcroft_karp(start1, step1, is_final1, symbols1, start2, step2, is_final2, symbols2):
+    """
+    Hopcroft-Karp equivalence check with union-find over the states of both automata.
+    Both alphabets must be the same set; the columns of the first one are used. Returns None if the
+    languages are equal, otherwise a shortest-first (BFS) word of labels distinguishing them.
+    """
+
+    columns2 = {symbol: i for i, symbol in enumerate(symbols2)}
+    columns2 = [columns2[symbol] for symbol in symbols1]
+    parent = dict()
+
+    def find(node):
+        root = node
+        while root in parent:
+            root = parent[root]
+        while node != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def word_to(index, symbol):
+        word = [symbols1[symbol]]
+        while index > 0:
+            index, symbol = trace[index]
+            word.append(symbols1[symbol])
+        word.reverse()
+        return tuple(word)
+
+    if is_final1(start1) != is_final2(start2):
+        return ()
+    parent[(1, start1)] = (2, start2)
+    pairs = [(start1, start2)]
+    trace = [(-1, None)]
+    for index, (state1, state2) in enumerate(pairs):
+        for symbol, symbol2 in enumerate(columns2):
+            state1_to = step1(state1, symbol)
+            state2_to = step2(state2, symbol2)
+            root1 = find((1, state1_to))
+            root2 = find((2, state2_to))
+            if root1 == root2:
+                continue
+            if is_final1(state1_to) != is_final2(state2_to):
+                return word_to(index, symbol)
+            parent[root1] = root2
+            pairs.append((state1_to, state2_to))
+            trace.append((index, symbol))
+    return None
@@ -2,26 +2,46 @@ import random
 from copy import deepcopy
 from typing import Dict, Set, Union, Hashable, Iterable, Literal
 
+from .compiled import CompiledNFA
+from .interned import InternedFSM, closure_masks, iter_bits
+from .profiling import phase
 from .state import State
 from .transition import Transition
 from .utils import fsm_plot
 
 
 class FSM:
-    __slots__ = ('_fsm', '_initial_states', '_final_states')
+    __slots__ = ('_fsm', '_initial_states', '_final_states', '_reverse_index')
 
     def __init__(self, *,
                  fsm: Dict[State, Dict[Transition, Union[State, Set[State]]]] = None,
                  initial_states: Set[State] = None,
                  final_states: Set[State] = None):
-        self._check_fsm(fsm, allow_none=True)
-        self._check_set_of_states(initial_states, allow_none=True)
-        self._check_set_of_states(final_states, allow_none=True)
+        self._check_arguments(fsm, initial_states, final_states)
         self._fsm = deepcopy(fsm) if fsm is not None else dict()
         self._initial_states = deepcopy(initial_states) if initial_states is not None else set()
         self._final_states = deepcopy(final_states) if final_states is not None else set()
+        self._reverse_index = None
+
+    @classmethod
+    def _adopt(cls, fsm: Dict[State, Dict[Transition, Union[State, Set[State]]]],
+               initial_states: Set[State], final_states: Set[State], *, check=False):
+        """
+        Internal constructor that takes ownership of the given containers instead of deep-copying them.
+        Validation is skipped unless `check` is set, so only pass freshly built containers of trusted content.
+        """
+        if check:
+            cls._check_arguments(fsm, initial_states, final_states)
+        fsm_obj = object.__new__(cls)
+        fsm_obj._fsm = fsm
+        fsm_obj._initial_states = initial_states
+        fsm_obj._final_states = final_states
+        fsm_obj._reverse_index = None
+        return fsm_obj
 
     def add_transition(self, state_from: State, transition: Transition, state_to: State) -> bool:
+        if self._reverse_index is not None:
+            return self._indexed_update(FSM.add_transition, state_from, transition, state_to)
         self._check_state(state_from, allow_none=False)
         self._check_transition(transition, allow_none=False)
         self._check_state(state_to, allow_none=False)
@@ -44,6 +64,8 @@ class FSM:
         return True
 
     def add_transitions(self, state_from: State, transition: Transition, states_to: Set[State]) -> bool:
+        if self._reverse_index is not None:
+            return self._indexed_update(FSM.add_transitions, state_from, transition, states_to)
         self._check_state(state_from, allow_none=False)
         self._check_transition(transition, allow_none=False)
         self._check_set_of_states(states_to, allow_none=False)
@@ -70,6 +92,8 @@ class FSM:
         return changed
 
     def set_transition(self, state_from: State, transition: Transition, state_to: State, replace=True) -> bool:
+        if self._reverse_index is not None:
+            return self._indexed_update(FSM.set_transition, state_from, transition, state_to, replace)
         self._check_state(state_from, allow_none=False)
         self._check_transition(transition, allow_none=False)
         self._check_state(state_to, allow_none=False)
@@ -84,6 +108,8 @@ class FSM:
         return changed
 
     def set_transitions(self, state_from: State, transition: Transition, states_to: Set[State], replace=True) -> bool:
+        if self._reverse_index is not None:
+            return self._indexed_update(FSM.set_transitions, state_from, transition, states_to, replace)
         self._check_state(state_from, allow_none=False)
         self._check_transition(transition, allow_none=False)
         self._check_set_of_states(states_to, allow_none=False)
@@ -99,6 +125,8 @@ class FSM:
         return changed
 
     def remove_transition(self, state_from: State, transition: Transition, state_to: State) -> bool:
+        if self._reverse_index is not None:
+            return self._indexed_update(FSM.remove_transition, state_from, transition, state_to)
         self._check_state(state_from, allow_none=False)
         self._check_transition(transition, allow_none=False)
         self._check_state(state_to, allow_none=False)
@@ -121,6 +149,8 @@ class FSM:
         return False
 
     def remove_transitions(self, state_from: State, transition: Transition, states_to: Set[State]) -> bool:
+        if self._reverse_index is not None:
+            return self._indexed_update(FSM.remove_transitions, state_from, transition, states_to)
         self._check_state(state_from, allow_none=False)
         self._check_transition(transition, allow_none=False)
         self._check_set_of_states(states_to, allow_none=False)
@@ -216,6 +246,9 @@ class FSM:
         if state not in self._fsm:
             return None
         transitions = self._fsm.pop(state)
+        if self._reverse_index is not None:
+            for states_to in transitions.values():
+                self._reindex(state, states_to, ())
         if state in self._initial_states:
             self._initial_states.remove(state)
         if state in self._final_states:
@@ -225,7 +258,10 @@ class FSM:
     def remove_states(self, states: Set[State]) -> None:
         self._check_set_of_states(states, allow_none=False)
         for state in states:
-            self._fsm.pop(state)
+            transitions = self._fsm.pop(state)
+            if self._reverse_index is not None:
+                for states_to in transitions.values():
+                    self._reindex(state, states_to, ())
             if state in self._initial_states:
                 self._initial_states.remove(state)
             if state in self._final_states:
@@ -243,6 +279,125 @@ class FSM:
         self._final_states.clear()
         return True
 
+    def enable_reverse_index(self) -> None:
+        """
+        Builds the reverse adjacency index (state -> predecessors with edge multiplicities) and keeps it up to date
+        in the transition and state mutators from now on, so coaccessible states are found without
+        rescanning all edges.
+        """
+
+        self._reverse_index = self._build_reverse_index()
+
+    def disable_reverse_index(self) -> None:
+        self._reverse_index = None
+
+    def has_reverse_index(self) -> bool:
+        return self._reverse_index is not None
+
+    def _build_reverse_index(self) -> Dict[State, Dict[State, int]]:
+        reverse_index = dict()
+        for state_from, transitions in self._fsm.items():
+            for states_to in transitions.values():
+                for state_to in (states_to,) if isinstance(states_to, State) else states_to:
+                    sources = reverse_index.setdefault(state_to, dict())
+                    sources[state_from] = sources.get(state_from, 0) + 1
+        return reverse_index
+
+    def _indexed_update(self, method, state_from, transition, *args) -> bool:
+        # runs a transition mutator with the index detached and applies the difference of the targets
+        old_states_to = self._targets(state_from, transition)
+        reverse_index, self._reverse_index = self._reverse_index, None
+        try:
+            changed = method(self, state_from, transition, *args)
+        finally:
+            self._reverse_index = reverse_index
+        self._reindex(state_from, old_states_to, self._targets(state_from, transition))
+        return changed
+
+    def _targets(self, state_from, transition) -> Set[State]:
+        transitions = self._fsm.get(state_from)
+        states_to = transitions.get(transition) if transitions is not None else None
+        if states_to is None:
+            return set()
+        return {states_to} if isinstance(states_to, State) else set(states_to)
+
+    def _reindex(self, state_from, old_states_to, new_states_to) -> None:
+        reverse_index = self._reverse_index
+        old_states_to = {old_states_to} if isinstance(old_states_to, State) else old_states_to
+        for state_to, delta in [(state_to, -1) for state_to in old_states_to if state_to not in new_states_to] + \
+                               [(state_to, 1) for state_to in new_states_to if state_to not in old_states_to]:
+            sources = reverse_index.setdefault(state_to, dict())
+            count = sources.get(state_from, 0) + delta
+            if count:
+                sources[state_from] = count
+            else:
+                del sources[state_from]
+                if not sources:
+                    del reverse_index[state_to]
+
+    def accessible_states(self) -> Set[State]:
+        """
+        States reachable from the initial states (linear time).
+        """
+
+        fsm = self._fsm
+        reached = {state for state in self._initial_states if state in fsm}
+        stack = list(reached)
+        while stack:
+            for states_to in fsm[stack.pop()].values():
+                for state_to in (states_to,) if isinstance(states_to, State) else states_to:
+                    if state_to not in reached and state_to in fsm:
+                        reached.add(state_to)
+                        stack.append(state_to)
+        return reached
+
+    def coaccessible_states(self) -> Set[State]:
+        """
+        States from which a final state is reachable (linear time; uses the reverse index if it is enabled).
+        """
+
+        fsm = self._fsm
+        reverse_index = self._reverse_index if self._reverse_index is not None else self._build_reverse_index()
+        reached = {state for state in self._final_states if state in fsm}
+        stack = list(reached)
+        while stack:
+            for state_from in reverse_index.get(stack.pop(), ()):
+                if state_from not in reached:
+                    reached.add(state_from)
+                    stack.append(state_from)
+        return reached
+
+    def accessible(self):
+        return self._restricted_to(self.accessible_states())
+
+    def coaccessible(self):
+        return self._restricted_to(self.coaccessible_states())
+
+    def trim(self):
+        """
+        Keeps only useful states (accessible and coaccessible); edges to removed or missing states are dropped.
+        """
+
+        accessible_states = self.accessible_states()
+        if not accessible_states.isdisjoint(self._final_states):
+            return self._restricted_to(accessible_states.intersection(self.coaccessible_states()))
+        return self._restricted_to(set())
+
+    def _restricted_to(self, states: Set[State]):
+        fsm = dict()
+        for state in states:
+            transitions = dict()
+            for transition, states_to in self._fsm[state].items():
+                if isinstance(states_to, State):
+                    if states_to in states:
+                        transitions[transition] = states_to
+                else:
+                    states_to = states_to.intersection(states)
+                    if states_to:
+                        transitions[transition] = states_to
+            fsm[state] = transitions
+        return self._adopt(fsm, self._initial_states.intersection(states), self._final_states.intersection(states))
+
     def has_state(self, state: State):
         self._check_state(state, allow_none=False)
         return state in self._fsm
@@ -259,7 +414,32 @@ class FSM:
         return set(self._fsm.keys())
 
     def copy(self):
-        return self.__class__(fsm=self._fsm, initial_states=self._initial_states, final_states=self._final_states)
+        """
+        Independent copy: the graph structure and every State and Transition object (once each) are copied,
+        so renaming a state or a label of the copy does not affect this FSM.
+        """
+
+        new_states = dict()
+        new_transitions = dict()
+
+        def copy_state(state: State) -> State:
+            new_state = new_states.get(state)
+            if new_state is None:
+                new_state = new_states[state] = state._trusted(state.uid)
+            return new_state
+
+        def copy_transition(transition: Transition) -> Transition:
+            new_transition = new_transitions.get(transition)
+            if new_transition is None:
+                new_transition = new_transitions[transition] = transition._trusted(transition.label)
+            return new_transition
+
+        fsm = {copy_state(state_from): {copy_transition(transition): {copy_state(state_to) for state_to in states_to}
+                                        if isinstance(states_to, set) else copy_state(states_to)
+                                        for transition, states_to in transitions.items()}
+               for state_from, transitions in self._fsm.items()}
+        return self._adopt(fsm, {copy_state(state) for state in self._initial_states},
+                           {copy_state(state) for state in self._final_states})
 
     def fsm_deepcopy(self) -> Dict[State, Dict[Transition, Union[State, Set[State]]]]:
         return deepcopy(self._fsm)
@@ -283,6 +463,124 @@ class FSM:
         final_states = {state.uid for state in self._final_states}
         return fsm, initial_states, final_states
 
+    def run(self, word: Iterable[Hashable]) -> Set[State]:
+        """
+        Returns the set of states reached after reading `word` (labels, not Transition objects).
+        Epsilon closures are computed once per visited state; one Transition is built per distinct symbol.
+        """
+
+        fsm = self._fsm
+        closures = dict()
+        transitions_by_symbol = dict()
+        current_states = self._epsilon_closure(self._initial_states, closures)
+        for symbol in word:
+            if not current_states:
+                break
+            transition = transitions_by_symbol.get(symbol)
+            if transition is None:
+                transition = transitions_by_symbol[symbol] = Transition(symbol)
+            next_states = set()
+            for state in current_states:
+                state_to = fsm[state].get(transition) if state in fsm else None
+                if state_to is None:
+                    continue
+                if isinstance(state_to, State):
+                    next_states.add(state_to)
+                else:
+                    next_states.update(state_to)
+            current_states = self._epsilon_closure(next_states, closures)
+        return current_states
+
+    def accepts(self, word: Iterable[Hashable]) -> bool:
+        return not self._final_states.isdisjoint(FSM.run(self, word))
+
+    def compile(self) -> CompiledNFA:
+        """
+        Returns a bit-parallel simulator (see CompiledNFA) that runs without determinization.
+        """
+
+        return CompiledNFA.from_fsm(self)
+
+    def is_subset_of(self, other, counterexample=False):
+        """
+        Language inclusion without determinization: a forward search over pairs (state of self, set of states
+        of other) pruned by antichains (a pair is dropped if a pair with the same state and a subset of its set
+        was already seen). With counterexample=True returns (result, word) where word is a tuple of labels
+        accepted by self but not by other (None if the inclusion holds).
+        """
+
+        FSM._check_fsm_class(other)
+        first = CompiledNFA.from_fsm(self)
+        second = CompiledNFA.from_fsm(other)
+        columns2 = [second._symbol_index.get(symbol) for symbol in first.symbols]
+        antichains = dict()
+        pairs = []
+        trace = []
+
+        def is_new(state, mask):
+            antichain = antichains.get(state, [])
+            if any(not old_mask & ~mask for old_mask in antichain):
+                return False
+            antichains[state] = [old_mask for old_mask in antichain if mask & ~old_mask] + [mask]
+            return True
+
+        def failure(index, column):
+            word = [] if column is None else [first.symbols[column]]
+            while index >= 0:
+                index, column = trace[index]
+                if column is not None:
+                    word.append(first.symbols[column])
+            word.reverse()
+            return (False, tuple(word)) if counterexample else False
+
+        for state in iter_bits(first.initial_state):
+            if first.is_final(1 << state) and not second.is_final(second.initial_state):
+                return failure(-1, None)
+            if is_new(state, second.initial_state):
+                pairs.append((state, second.initial_state))
+                trace.append((-1, None))
+        for index, (state, mask) in enumerate(pairs):
+            for column, column2 in enumerate(columns2):
+                states_to = first._successors[column][state]
+                if not states_to:
+                    continue
+                mask_to = second._step(mask, column2) if mask and column2 is not None else 0
+                for state_to in iter_bits(states_to):
+                    if first.is_final(1 << state_to) and not second.is_final(mask_to):
+                        return failure(index, column)
+                    if is_new(state_to, mask_to):
+                        pairs.append((state_to, mask_to))
+                        trace.append((index, column))
+        return (True, None) if counterexample else True
+
+    def matcher(self):
+        """
+        Returns a streaming Matcher over the compiled automaton.
+        """
+
+        from .matcher import Matcher
+        return Matcher(self.compile())
+
+    def _epsilon_closure(self, states: Iterable[State], closures: Dict[State, Set[State]]) -> Set[State]:
+        fsm = self._fsm
+        result = set()
+        for state in states:
+            closure = closures.get(state)
+            if closure is None:
+                closure = {state}
+                stack = [state]
+                while stack:
+                    for transition, states_to in fsm.get(stack.pop(), dict()).items():
+                        if not transition.is_epsilon():
+                            continue
+                        for state_to in ((states_to,) if isinstance(states_to, State) else states_to):
+                            if state_to not in closure:
+                                closure.add(state_to)
+                                stack.append(state_to)
+                closures[state] = closure
+            result.update(closure)
+        return result
+
     def alphabet(self):
         alphabet = set()
         for transitions in self._fsm.values():
@@ -344,23 +642,23 @@ class FSM:
                self._final_states == other._final_states if isinstance(other, self.__class__) else False
 
     def __hash__(self) -> int:
-        fsm = []
-        for state_from, transitions in self._fsm.items():
-            for transition, state_to in transitions.items():
-                if isinstance(state_to, set):
-                    state_to = tuple(sorted(state_to))
-                fsm.append((state_from, transition, state_to))
-        fsm.sort()
-        fsm = tuple(fsm)
-        initial_states = tuple(self._initial_states)
-        final_states = tuple(self._final_states)
-        return hash((fsm, initial_states, final_states))
+        fsm = frozenset((state_from, transition, frozenset(state_to) if isinstance(state_to, set) else state_to)
+                        for state_from, transitions in self._fsm.items()
+                        for transition, state_to in transitions.items())
+        return hash((fsm, frozenset(self._initial_states), frozenset(self._final_states)))
 
     def __iter__(self):
         for state_from, transitions in self._fsm.items():
             for transition, state_to in transitions.items():
                 yield state_from, transition, state_to
 
+    @classmethod
+    def _check_arguments(cls, fsm: Dict[State, Dict[Transition, Union[State, Set[State]]]],
+                         initial_states: Set[State], final_states: Set[State]):
+        cls._check_fsm(fsm, allow_none=True)
+        cls._check_set_of_states(initial_states, allow_none=True)
+        cls._check_set_of_states(final_states, allow_none=True)
+
     @classmethod
     def _check_fsm(cls, fsm: Dict[State, Dict[Transition, Union[State, Set[State]]]], *, allow_none):
         cls_name = cls.__name__
@@ -418,23 +716,36 @@ class FSM:
             raise TypeError(f'{cls_name}. Argument `initial_states` must be None or Set[Hashable]')
         if not (isinstance(final_states, set) and all(isinstance(s, Hashable) for s in final_states)):
             raise TypeError(f'{cls_name}. Argument `final_states` must be None or Set[Hashable]')
+        states = dict()
+        transitions_by_label = dict()
+
+        def to_state(uid):
+            if isinstance(uid, State):
+                return uid
+            state = states.get(uid)
+            if state is None:
+                state = states[uid] = State(uid)
+            return state
+
         new_fsm = dict()
         for state_from, transitions in fsm.items():
-            if not isinstance(state_from, State):
-                state_from = State(state_from)
-            new_fsm.setdefault(state_from, dict())
+            state_from = to_state(state_from)
+            new_transitions = new_fsm.setdefault(state_from, dict())
             for transition, state_to in transitions.items():
                 if not isinstance(transition, Transition):
-                    transition = Transition(transition)
-                if not isinstance(state_to, set) and not isinstance(state_to, State):
-                    state_to = State(state_to)
-                elif isinstance(state_to, set):
-                    state_to = {s if isinstance(s, State) else State(s) for s in state_to}
-                new_fsm[state_from].setdefault(transition, state_to)
+                    label = transition
+                    transition = transitions_by_label.get(label)
+                    if transition is None:
+                        transition = transitions_by_label[label] = Transition(label)
+                if isinstance(state_to, set):
+                    state_to = {to_state(s) for s in state_to}
+                else:
+                    state_to = to_state(state_to)
+                new_transitions.setdefault(transition, state_to)
         fsm = new_fsm
-        initial_states = {s if isinstance(s, State) else State(s) for s in initial_states}
-        final_states = {s if isinstance(s, State) else State(s) for s in final_states}
-        return FSM(fsm=fsm, initial_states=initial_states, final_states=final_states)
+        initial_states = {to_state(s) for s in initial_states}
+        final_states = {to_state(s) for s in final_states}
+        return FSM._adopt(fsm, initial_states, final_states)
 
     @classmethod
     def generate(cls, deterministic: bool,
@@ -442,7 +753,13 @@ class FSM:
                  transitions_alphabet: Union[str, list, tuple, set], min_transitions_from_state: int,
                  max_transitions_from_state: int,
                  min_initial_states: int, max_initial_states: int,
-                 min_final_states: int, max_final_states: int):
+                 min_final_states: int, max_final_states: int, *, seed=None):
+        """
+        Random FSM over states and labels drawn from the given alphabets.
+        `seed` (int or random.Random) makes the result reproducible; by default the global random state is used.
+        For large automata see fsm_lib.generator, which builds integer tables directly.
+        """
+
         if not isinstance(deterministic, bool):
             raise TypeError()
         if not hasattr(states_alphabet, '__iter__'):
@@ -457,82 +774,109 @@ class FSM:
             raise TypeError()
         if not isinstance(min_final_states, int) or not isinstance(max_final_states, int):
             raise TypeError()
+        rng = seed if isinstance(seed, random.Random) else random if seed is None else random.Random(seed)
         states_alphabet = iter(states_alphabet)
         transitions_alphabet = iter(transitions_alphabet)
         fsm = dict()
         states = [next(states_alphabet) for _ in range(max_states)]
         states = [s if isinstance(s, State) else State(s) for s in states]
-        transitions = random.choices(population=list(transitions_alphabet), k=max_transitions_from_state)
+        transitions = rng.choices(population=list(transitions_alphabet), k=max_transitions_from_state)
         transitions = [t if isinstance(t, Transition) else Transition(t) for t in transitions]
-        states = random.sample(population=states, k=random.randint(min_states, max_states))
+        states = rng.sample(population=states, k=rng.randint(min_states, max_states))
         for state in states:
             fsm[state] = dict()
-            for transition in random.sample(population=transitions, k=random.randint(min_transitions_from_state,
-                                                                                     max_transitions_from_state)):
+            for transition in rng.sample(population=transitions, k=rng.randint(min_transitions_from_state,
+                                                                               max_transitions_from_state)):
                 if deterministic:
-                    fsm[state][transition] = random.choice(states)
+                    fsm[state][transition] = rng.choice(states)
                 else:
-                    fsm[state][transition] = set(random.sample(population=states,
-                                                               k=random.randint(min(len(states),
-                                                                                    min_transitions_from_state),
-                                                                                min(len(states),
-                                                                                    max_transitions_from_state))))
-        initial_states = set(random.sample(population=states, k=random.randint(min(len(states), min_initial_states),
-                                                                               min(len(states), max_initial_states))))
-        final_states = set(random.sample(population=states, k=random.randint(min(len(states), min_final_states),
-                                                                             min(len(states), max_final_states))))
-        return FSM(fsm=fsm, initial_states=set(initial_states), final_states=set(final_states))
+                    fsm[state][transition] = set(rng.sample(population=states,
+                                                            k=rng.randint(min(len(states),
+                                                                              min_transitions_from_state),
+                                                                          min(len(states),
+                                                                              max_transitions_from_state))))
+        initial_states = set(rng.sample(population=states, k=rng.randint(min(len(states), min_initial_states),
+                                                                         min(len(states), max_initial_states))))
+        final_states = set(rng.sample(population=states, k=rng.randint(min(len(states), min_final_states),
+                                                                       min(len(states), max_final_states))))
+        return FSM._adopt(fsm, initial_states, final_states)
 
     def eliminate_epsilon_transitions(self):
+        """
+        Epsilon closures are computed by SCC condensation (Tarjan) and one pass in reverse topological order;
+        the closure bitmask and the merged transitions are built once per component and shared by its states.
+        Without epsilon transitions the graph is only copied. Transitions to states missing from the graph are dropped.
+        """
+
         fsm = self._fsm
         initial_states = self._initial_states
         final_states = self._final_states
 
         if not fsm or not initial_states:
-            return FSM(fsm=dict(), initial_states=set(), final_states=set())
-
-        new_fsm = dict()
-        new_initial_states = initial_states.copy()
-        new_final_states = final_states.copy()
-        from_state_to_state_by_epsilon = dict()
-
-        b = False
-        for state_from, transitions in fsm.items():
-            new_fsm.setdefault(state_from, dict())
-            from_state_to_state_by_epsilon.setdefault(state_from, set())
-            for transition, states_to in transitions.items():
-                if transition.is_epsilon():
-                    b = True
-                    all_states = {state_from}
-                    if isinstance(states_to, (set, frozenset)):
-                        all_states.update(state_to for state_to in states_to if state_to in fsm)
-                    elif isinstance(states_to, State) and states_to in fsm:
-                        all_states.add(states_to)
-                    from_state_to_state_by_epsilon[state_from].update(all_states)
-                else:
-                    new_fsm[state_from].setdefault(transition, set())
-                    if isinstance(states_to, (set, frozenset)):
-                        new_fsm[state_from][transition].update(state_to for state_to in states_to if state_to in fsm)
-                    elif isinstance(states_to, State) and states_to in fsm:
-                        new_fsm[state_from][transition].add(states_to)
-        while b:
-            b = False
-            for state_from, next_states in from_state_to_state_by_epsilon.items():
-                states_by_epsilon = from_state_to_state_by_epsilon.get(state_from, set())
-                for next_state in next_states.copy():
-                    previous_length = len(states_by_epsilon)
-                    states_by_epsilon.update(from_state_to_state_by_epsilon.get(next_state, set()))
-                    b |= (previous_length != len(states_by_epsilon))
-        for state_from, next_states in from_state_to_state_by_epsilon.items():
-            for next_state in next_states:
-                for transition, states_to in new_fsm[next_state].items():
-                    new_fsm[state_from].setdefault(transition, set()).update(states_to)
-            if state_from in new_initial_states:
-                new_initial_states.update(next_states)
-            if not new_final_states.isdisjoint(next_states):
-                new_final_states.add(state_from)
-
-        return FSM(fsm=new_fsm, initial_states=new_initial_states, final_states=new_final_states)
+            return FSM._adopt(dict(), set(), set())
+
+        if not any(transition.is_epsilon() for transitions in fsm.values() for transition in transitions):
+            new_fsm = {state: {transition: ({states_to} if states_to in fsm else set()) if isinstance(states_to, State)
+                               else {state_to for state_to in states_to if state_to in fsm}
+                               for transition, states_to in transitions.items()}
+                       for state, transitions in fsm.items()}
+            return FSM._adopt(new_fsm, initial_states.copy(), final_states.copy())
+
+        with phase('eliminate_epsilon_transitions') as profiled:
+            interned = InternedFSM(self)
+            n_states = len(fsm)  # interned states 0..n_states-1 are the keys of `fsm`, in order
+            states = interned.states
+            symbols = interned.symbols
+            epsilon = [[state_to for state_to in set(states_to) if state_to < n_states]
+                       for states_to in interned.epsilon[:n_states]]
+            component, closures = closure_masks(epsilon)
+
+            # merged[c][symbol]: set of targets of `symbol` from any state of the epsilon closure of component c
+            merged = []
+            members_of = [[] for _ in closures]
+            for state in range(n_states):
+                members_of[component[state]].append(state)
+            for c, members in enumerate(members_of):
+                transitions = dict()
+                for state in members:
+                    for symbol, states_to in interned.delta[state].items():
+                        targets = transitions.get(symbol)
+                        if targets is None:
+                            targets = transitions[symbol] = set()
+                        targets.update(state_to for state_to in states_to if state_to < n_states)
+                successor_components = {component[state_to] for state in members for state_to in epsilon[state]}
+                for successor_component in successor_components:
+                    if successor_component != c:
+                        for symbol, states_to in merged[successor_component].items():
+                            targets = transitions.get(symbol)
+                            if targets is None:
+                                transitions[symbol] = set(states_to)
+                            else:
+                                targets.update(states_to)
+                merged.append(transitions)
+
+            new_fsm = dict()
+            final_mask = sum(1 << interned.state_index[state] for state in final_states if state in fsm)
+            new_initial_states = initial_states.copy()
+            new_final_states = final_states.copy()
+            merged = [[(symbols[symbol], [states[state_to] for state_to in states_to])
+                       for symbol, states_to in transitions.items()] for transitions in merged]
+            for state in range(n_states):
+                c = component[state]
+                new_fsm[states[state]] = {transition: set(states_to) for transition, states_to in merged[c]}
+                if closures[c] & final_mask:
+                    new_final_states.add(states[state])
+            for state in initial_states:
+                if state in fsm:
+                    closure = closures[component[interned.state_index[state]]]
+                    new_initial_states.update(states[i] for i in iter_bits(closure))
+
+            if profiled:
+                profiled.set(states=len(new_fsm), epsilon_components=len(closures),
+                             transitions=sum(len(states_to) for transitions in new_fsm.values()
+                                             for states_to in transitions.values()),
+                             peak_closure_size=max((bin(mask).count('1') for mask in closures), default=0))
+        return FSM._adopt(new_fsm, new_initial_states, new_final_states)
 
     def reverse(self):
         inv_fsm = dict()
@@ -543,8 +887,7 @@ class FSM:
                     states_to = {states_to}
                 for state_to in states_to:
                     inv_fsm.setdefault(state_to, dict()).setdefault(transition, set()).add(state)
-        return FSM(fsm=inv_fsm, initial_states=self._final_states.copy(),
-                   final_states=self._initial_states.copy())
+        return FSM._adopt(inv_fsm, self._final_states.copy(), self._initial_states.copy())
 
     def plot(self, filename: str, rankdir: Union[Literal['TB'], Literal['BT'], Literal['LR'], Literal['RL']] = 'TB'):
         fsm_plot(filename, *self.to_original(), rankdir=rankdir)
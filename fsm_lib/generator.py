@@ -0,0 +1,115 @@
+import random
+from array import array
+from typing import Hashable, Iterator, List, Sequence, Tuple, Union
+
+from .compiled import DEAD, CompiledDFA
+
+Seed = Union[None, int, random.Random]
+
+
+def random_dfa(n_states: int, symbols: Union[int, Sequence[Hashable]], *,
+               density: float = 1.0, final_probability: float = 0.5,
+               reachable: bool = True, accessible_only: bool = False,
+               seed: Seed = None, use_numpy: bool = False) -> CompiledDFA:
+    """
+    Random DFA built directly as a CompiledDFA table (no State/Transition objects; use
+    DeterministicFSM.from_compiled when they are needed). State 0 is initial.
+
+    :param symbols: labels, or their number (labels 0..symbols-1)
+    :param density: probability that a transition exists (besides the spanning tree)
+    :param final_probability: probability that a state is final
+    :param reachable: every state is reachable from state 0 through a random spanning tree
+    :param accessible_only: drop the states that are not reachable (only matters if reachable=False)
+    :param seed: int or random.Random; equal seeds give equal automata for a given backend
+    :param use_numpy: draw the table with numpy (much faster for millions of transitions; numpy required)
+    """
+
+    labels = tuple(range(symbols)) if isinstance(symbols, int) else tuple(symbols)
+    n_symbols = len(labels)
+    if not isinstance(n_states, int) or n_states < 1:
+        raise ValueError('Argument `n_states` must be a positive int')
+    if not 0.0 <= density <= 1.0 or not 0.0 <= final_probability <= 1.0:
+        raise ValueError('Arguments `density` and `final_probability` must be in [0, 1]')
+    if reachable and n_states > 1 and not n_symbols:
+        raise ValueError('States cannot be reachable without symbols')
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    size = n_states * n_symbols
+
+    if use_numpy:
+        import numpy
+        generator = numpy.random.default_rng(rng.getrandbits(64))
+        filled = generator.random(size) < density
+        table = numpy.where(filled, generator.integers(0, n_states, size), DEAD).astype(numpy.intc)
+        final_flags = (generator.random(n_states) < final_probability).tolist()
+        uniforms = generator.random(n_states).tolist() if reachable else ()
+        table = array('i', table.tobytes())
+    else:
+        randrange = rng.randrange
+        uniform = rng.random
+        table = array('i', [randrange(n_states) if uniform() < density else DEAD for _ in range(size)])
+        final_flags = [uniform() < final_probability for _ in range(n_states)]
+        uniforms = [uniform() for _ in range(n_states)] if reachable else ()
+
+    if reachable:
+        # spanning tree: state i becomes the target of a random free slot of states 0..i-1
+        slots = list(range(n_symbols))
+        for state in range(1, n_states):
+            index = int(uniforms[state] * len(slots))
+            slot = slots[index]
+            slots[index] = slots[-1]
+            slots.pop()
+            table[slot] = state
+            slots.extend(range(state * n_symbols, (state + 1) * n_symbols))
+    final_states = [state for state, flag in enumerate(final_flags) if flag]
+    compiled = CompiledDFA(symbols=labels, table=table, n_states=n_states, initial_state=0,
+                           final_states=final_states)
+    if accessible_only and not reachable:
+        compiled = _accessible_part(compiled)
+    return compiled
+
+
+def _accessible_part(compiled: CompiledDFA) -> CompiledDFA:
+    """
+    Renumbers the states reachable from the initial state in BFS order, keeping the column order.
+    """
+
+    table = compiled._table
+    n_symbols = compiled.n_symbols
+    new_ids = {compiled.initial_state: 0}
+    order = [compiled.initial_state]
+    new_table = array('i')
+    for state in order:
+        for state_to in table[state * n_symbols:(state + 1) * n_symbols]:
+            if state_to != DEAD:
+                new_id = new_ids.get(state_to)
+                if new_id is None:
+                    new_id = new_ids[state_to] = len(order)
+                    order.append(state_to)
+                state_to = new_id
+            new_table.append(state_to)
+    return CompiledDFA(symbols=compiled.symbols, table=new_table, n_states=len(order), initial_state=0,
+                       final_states=[i for i, state in enumerate(order) if compiled.is_final(state)])
+
+
+def iter_random_edges(n_states: int, symbols: Union[int, Sequence[Hashable]], *,
+                      density: float = 1.0, reachable: bool = True,
+                      seed: Seed = None) -> Iterator[Tuple[int, Hashable, int]]:
+    """
+    Lazily yields the (state_from, label, state_to) edges of a random DFA over states 0..n_states-1,
+    ordered by state_from, in O(1) memory (for automata that do not fit in memory or are consumed once).
+    With reachable=True state i has an edge to i + 1 on a random label, so all states are reachable from 0.
+    """
+
+    labels: List[Hashable] = list(range(symbols)) if isinstance(symbols, int) else list(symbols)
+    if reachable and n_states > 1 and not labels:
+        raise ValueError('States cannot be reachable without symbols')
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    randrange = rng.randrange
+    uniform = rng.random
+    for state in range(n_states):
+        chain_label = randrange(len(labels)) if reachable and state + 1 < n_states else -1
+        for column, label in enumerate(labels):
+            if column == chain_label:
+                yield state, label, state + 1
+            elif uniform() < density:
+                yield state, label, randrange(n_states)
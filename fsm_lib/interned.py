@@ -0,0 +1,153 @@
+from typing import Dict, Hashable, Iterator, List, Set, Tuple
+
+from .state import State
+from .transition import Transition
+
+
+class InternedFSM:
+    """
+    Integer view of an FSM: states and labels are numbered once per automaton (symbol tables),
+    so algorithms work on small ints and map back to State/Transition objects only at the API boundary.
+
+    delta[state][symbol] is the list of target states; epsilon[state] is the list of epsilon targets.
+    States that only appear as transition targets or initial states are numbered too.
+    """
+
+    __slots__ = ('states', 'state_index', 'symbols', 'symbol_index', 'delta', 'epsilon',
+                 'initial_states', 'final_states')
+
+    def __init__(self, fsm_obj):
+        fsm = fsm_obj._fsm
+        states: List[State] = list(fsm)
+        state_index: Dict[State, int] = {state: i for i, state in enumerate(states)}
+        symbols: List[Transition] = []
+        symbol_index: Dict[Transition, int] = dict()
+        delta: List[Dict[int, List[int]]] = [dict() for _ in states]
+        epsilon: List[List[int]] = [[] for _ in states]
+
+        def intern_state(state: State) -> int:
+            i = state_index.get(state)
+            if i is None:
+                i = state_index[state] = len(states)
+                states.append(state)
+                delta.append(dict())
+                epsilon.append([])
+            return i
+
+        for i, transitions in enumerate(fsm.values()):
+            for transition, states_to in transitions.items():
+                if isinstance(states_to, State):
+                    targets = [intern_state(states_to)]
+                else:
+                    targets = [intern_state(state_to) for state_to in states_to]
+                if transition.is_epsilon():
+                    epsilon[i].extend(targets)
+                    continue
+                symbol = symbol_index.get(transition)
+                if symbol is None:
+                    symbol = symbol_index[transition] = len(symbols)
+                    symbols.append(transition)
+                delta[i][symbol] = targets
+        self.initial_states: List[int] = [intern_state(state) for state in fsm_obj._initial_states]
+        self.final_states: Set[int] = {state_index[state] for state in fsm_obj._final_states if state in state_index}
+        self.states = states
+        self.state_index = state_index
+        self.symbols = symbols
+        self.symbol_index = symbol_index
+        self.delta = delta
+        self.epsilon = epsilon
+
+    @property
+    def labels(self) -> List[Hashable]:
+        return [symbol.label for symbol in self.symbols]
+
+    def has_epsilon_transitions(self) -> bool:
+        return any(self.epsilon)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    Yields indexes of set bits of `mask` in increasing order.
+    """
+
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def strongly_connected_components(successors: List[List[int]]) -> Tuple[List[int], List[List[int]]]:
+    """
+    Tarjan's algorithm (iterative) over the graph given by successor lists of states 0..n-1.
+    Returns (component of each state, members of each component); components come in reverse topological
+    order, i.e. every edge leads to the same component or to one listed earlier.
+    """
+
+    n_states = len(successors)
+    index = [-1] * n_states
+    low_link = [0] * n_states
+    on_stack = [False] * n_states
+    component = [-1] * n_states
+    components = []
+    stack = []
+    counter = 0
+    for root in range(n_states):
+        if index[root] != -1:
+            continue
+        index[root] = low_link[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        call_stack = [(root, iter(successors[root]))]
+        while call_stack:
+            state, state_successors = call_stack[-1]
+            for state_to in state_successors:
+                if index[state_to] == -1:
+                    index[state_to] = low_link[state_to] = counter
+                    counter += 1
+                    stack.append(state_to)
+                    on_stack[state_to] = True
+                    call_stack.append((state_to, iter(successors[state_to])))
+                    break
+                if on_stack[state_to] and index[state_to] < low_link[state]:
+                    low_link[state] = index[state_to]
+            else:
+                call_stack.pop()
+                if call_stack:
+                    parent = call_stack[-1][0]
+                    if low_link[state] < low_link[parent]:
+                        low_link[parent] = low_link[state]
+                if low_link[state] == index[state]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = len(components)
+                        members.append(member)
+                        if member == state:
+                            break
+                    components.append(members)
+    return component, components
+
+
+def closure_masks(successors: List[List[int]]) -> Tuple[List[int], List[int]]:
+    """
+    Reflexive-transitive closures as bitmasks, computed per strongly connected component in one pass
+    over the condensation. Returns (component of each state, closure mask of each component);
+    all states of a component share its mask.
+    """
+
+    component, components = strongly_connected_components(successors)
+    masks = []
+    for c, members in enumerate(components):
+        mask = 0
+        for state in members:
+            mask |= 1 << state
+        for successor_component in {component[state_to] for state in members for state_to in successors[state]}:
+            if successor_component != c:
+                mask |= masks[successor_component]
+        masks.append(mask)
+    return component, masks
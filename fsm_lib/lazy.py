@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from typing import Hashable, Iterable, Union
+
+from .compiled import CompiledNFA
+from .fsm import FSM
+
+
+class _LazyState:
+    __slots__ = ('mask', 'is_final', 'next', 'sources')
+
+    def __init__(self, mask: int, is_final: bool, n_symbols: int):
+        self.mask = mask
+        self.is_final = is_final
+        self.next = [None] * n_symbols
+        self.sources = set()  # (state, column) pairs linking to this state; None once evicted
+
+
+class LazyDFA:
+    """
+    On-the-fly determinization of an FSM.
+    Subset states (bitmasks of CompiledNFA) are built only when an input reaches them and are kept in a
+    bounded LRU cache; cached states link to each other directly, so a cached step is one list lookup.
+    Links are only made between cached states and are removed in both directions on eviction.
+    When the cache thrashes (states are evicted while fewer than `min_symbols_per_state` symbols are read
+    per built state) the current run falls back to bit-parallel NFA simulation, as RE2 does.
+    """
+
+    __slots__ = ('_nfa', '_max_states', '_min_symbols_per_state', '_cache', '_n_built', '_n_evicted',
+                 '_n_fallbacks')
+
+    DEAD = CompiledNFA.DEAD
+
+    def __init__(self, fsm_obj: Union[FSM, CompiledNFA], max_states: int = 10000, min_symbols_per_state: int = 10):
+        cls_name = self.__class__.__name__
+        if isinstance(fsm_obj, FSM):
+            fsm_obj = CompiledNFA.from_fsm(fsm_obj)
+        if not isinstance(fsm_obj, CompiledNFA):
+            raise TypeError(f'{cls_name}. Argument must be an object of class FSM or CompiledNFA, got: {type(fsm_obj)}')
+        if not isinstance(max_states, int) or max_states < 1:
+            raise ValueError(f'{cls_name}. Argument `max_states` must be a positive int')
+        self._nfa = fsm_obj
+        self._max_states = max_states
+        self._min_symbols_per_state = min_symbols_per_state
+        self._cache = OrderedDict()
+        self._n_built = 0
+        self._n_evicted = 0
+        self._n_fallbacks = 0
+        self._get_state(fsm_obj.initial_state)
+
+    @property
+    def nfa(self) -> CompiledNFA:
+        return self._nfa
+
+    @property
+    def initial_state(self) -> int:
+        return self._nfa.initial_state
+
+    @property
+    def stats(self) -> dict:
+        return {'cached_states': len(self._cache), 'built_states': self._n_built,
+                'evicted_states': self._n_evicted, 'nfa_fallbacks': self._n_fallbacks}
+
+    def is_final(self, mask: int) -> bool:
+        return self._nfa.is_final(mask)
+
+    def clear(self) -> None:
+        for lazy_state in self._cache.values():
+            lazy_state.sources = None
+        self._cache.clear()
+        self._get_state(self._nfa.initial_state)
+
+    def _get_state(self, mask: int) -> _LazyState:
+        cache = self._cache
+        lazy_state = cache.get(mask)
+        if lazy_state is not None:
+            cache.move_to_end(mask)
+            return lazy_state
+        lazy_state = cache[mask] = _LazyState(mask, self._nfa.is_final(mask), len(self._nfa.symbols))
+        self._n_built += 1
+        if len(cache) > self._max_states:
+            _, evicted = cache.popitem(last=False)
+            # unlink it both ways, so cached states never lead to (or keep alive) evicted ones
+            for source, column in evicted.sources:
+                source.next[column] = None
+            for column, target in enumerate(evicted.next):
+                if target is not None:
+                    target.sources.discard((evicted, column))
+            evicted.next = [None] * len(evicted.next)
+            evicted.sources = None
+            self._n_evicted += 1
+        return lazy_state
+
+    def _next_state(self, lazy_state: _LazyState, column: int) -> _LazyState:
+        """
+        Builds (or finds) the successor of a state without a link for `column` and links them, unless building
+        it evicted `lazy_state` (a run may still be in an evicted state).
+        """
+
+        next_state = self._get_state(self._nfa._step(lazy_state.mask, column))
+        if lazy_state.sources is not None:
+            lazy_state.next[column] = next_state
+            next_state.sources.add((lazy_state, column))
+        return next_state
+
+    def step(self, mask: int, symbol: Hashable) -> int:
+        column = self._nfa._symbol_index.get(symbol)
+        if column is None or not mask:
+            return self.DEAD
+        lazy_state = self._get_state(mask)
+        next_state = lazy_state.next[column]
+        if next_state is None:
+            next_state = self._next_state(lazy_state, column)
+        return next_state.mask
+
+    def run(self, word: Iterable[Hashable]) -> int:
+        """
+        Returns the mask of NFA states reached after reading `word` (0 if the run gets stuck).
+        """
+
+        return self._feed(self._get_state(self._nfa.initial_state), word)
+
+    def feed(self, mask: int, symbols: Iterable[Hashable]) -> int:
+        """
+        Continues a run from `mask`; used for incremental (streaming) input.
+        """
+
+        if not mask:
+            return self.DEAD
+        return self._feed(self._get_state(mask), symbols)
+
+    def _feed(self, lazy_state: _LazyState, symbols: Iterable[Hashable]) -> int:
+        nfa = self._nfa
+        symbol_index = nfa._symbol_index
+        nfa_step = nfa._step
+        next_state_of = self._next_state
+        evicted_before = self._n_evicted
+        built_before = self._n_built
+        n_symbols = 0
+        symbols = iter(symbols)
+        for symbol in symbols:
+            if not lazy_state.mask:
+                return self.DEAD
+            column = symbol_index.get(symbol)
+            if column is None:
+                return self.DEAD
+            next_state = lazy_state.next[column]
+            if next_state is None:
+                next_state = next_state_of(lazy_state, column)
+                if self._n_evicted != evicted_before and \
+                        n_symbols < self._min_symbols_per_state * (self._n_built - built_before):
+                    self._n_fallbacks += 1
+                    mask = next_state.mask
+                    for symbol in symbols:
+                        if not mask:
+                            return self.DEAD
+                        column = symbol_index.get(symbol)
+                        if column is None:
+                            return self.DEAD
+                        mask = nfa_step(mask, column)
+                    return mask
+            lazy_state = next_state
+            n_symbols += 1
+        return lazy_state.mask
+
+    def accepts(self, word: Iterable[Hashable]) -> bool:
+        return self._nfa.is_final(self.run(word))
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(nfa={self._nfa!r}, max_states={self._max_states}, stats={self.stats})'
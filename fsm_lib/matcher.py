@@ -0,0 +1,60 @@
+from typing import Hashable, Iterable, Union
+
+from .compiled import CompiledDFA, CompiledNFA, CompressedDFA
+from .lazy import LazyDFA
+
+
+class Matcher:
+    """
+    Incremental (streaming) run of a compiled automaton.
+    Input is consumed chunk by chunk with feed(); bytes chunks are read as ints (0..255), str chunks as characters,
+    any other iterable as a sequence of labels. The whole run state is `state`: a plain int (a state index of
+    CompiledDFA/CompressedDFA or a state bitmask of CompiledNFA/LazyDFA) that can be pickled and assigned back
+    to resume.
+    """
+
+    __slots__ = ('_engine', '_state')
+
+    def __init__(self, engine: Union[CompiledDFA, CompressedDFA, CompiledNFA, LazyDFA], state: int = None):
+        cls_name = self.__class__.__name__
+        if not isinstance(engine, (CompiledDFA, CompressedDFA, CompiledNFA, LazyDFA)):
+            raise TypeError(f'{cls_name}. Argument must be an object of class CompiledDFA, CompressedDFA, '
+                            f'CompiledNFA or LazyDFA, got: {type(engine)}')
+        self._engine = engine
+        self._state = engine.initial_state if state is None else state
+
+    @property
+    def engine(self) -> Union[CompiledDFA, CompressedDFA, CompiledNFA, LazyDFA]:
+        return self._engine
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    @state.setter
+    def state(self, value: int):
+        if not isinstance(value, int):
+            raise TypeError(f'`{self.__class__.__name__}.state` must be an int, got: {type(value)}')
+        self._state = value
+
+    @property
+    def is_accepting(self) -> bool:
+        return self._engine.is_final(self._state)
+
+    @property
+    def is_dead(self) -> bool:
+        return self._state == self._engine.DEAD
+
+    def feed(self, chunk: Iterable[Hashable]) -> bool:
+        """
+        Consumes the next chunk of input; returns whether the input read so far is accepted.
+        """
+
+        self._state = self._engine.feed(self._state, chunk)
+        return self._engine.is_final(self._state)
+
+    def reset(self) -> None:
+        self._state = self._engine.initial_state
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(engine={self._engine!r}, state={self._state!r})'
@@ -0,0 +1,125 @@
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Union
+
+Number = Union[int, float]
+
+
+class Phase:
+    """
+    One timed phase of an algorithm with its counters (state/transition counts, peak set sizes, rounds).
+    A Phase is truthy; the no-op phase returned while profiling is disabled is falsy, so instrumented code
+    guards any extra work needed only for counters with `if phase:`.
+    """
+
+    __slots__ = ('name', 'seconds', 'counters', '_start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.counters: Dict[str, Number] = dict()
+        self._start = 0.0
+
+    def set(self, **counters: Number) -> None:
+        self.counters.update(counters)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __enter__(self) -> 'Phase':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.seconds = time.perf_counter() - self._start
+        profile = _active_profile.get()
+        if profile is not None:
+            profile._add(self)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.name!r}, seconds={self.seconds:.6f}, counters={self.counters})'
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def set(self, **counters: Number) -> None:
+        pass
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> '_NoPhase':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+_active_profile: ContextVar[Optional['Profile']] = ContextVar('fsm_lib_profile', default=None)
+
+
+def phase(name: str) -> Union[Phase, _NoPhase]:
+    """
+    Context manager timing the phase `name` of the active profile; a shared no-op object if there is none.
+    """
+
+    return _NO_PHASE if _active_profile.get() is None else Phase(name)
+
+
+class Profile:
+    """
+    Opt-in instrumentation of the algorithm pipelines; while the context is active (in the current thread or
+    task), the phases of eliminate_epsilon_transitions, from_fsm, minimize and _brzozowski are recorded:
+
+        with Profile() as profile:
+            DeterministicFSM.from_fsm(fsm).minimize()
+        profile.summary()  # {'from_fsm.subset_construction': {'calls': 2, 'seconds': ..., 'dfa_states': ...}, ...}
+
+    `callback(phase)` is called for every finished phase, e.g. to export metrics. Phases nest (minimize runs
+    from_fsm), so the seconds of nested phases are also included in the outer ones.
+    """
+
+    __slots__ = ('phases', '_callback', '_token')
+
+    def __init__(self, callback: Callable[[Phase], None] = None):
+        self.phases: List[Phase] = []
+        self._callback = callback
+        self._token = None
+
+    def __enter__(self) -> 'Profile':
+        if self._token is not None:
+            raise RuntimeError(f'{self.__class__.__name__}. Profile is already active')
+        self._token = _active_profile.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        _active_profile.reset(self._token)
+        self._token = None
+
+    def _add(self, phase: Phase) -> None:
+        self.phases.append(phase)
+        if self._callback is not None:
+            self._callback(phase)
+
+    def summary(self) -> Dict[str, Dict[str, Number]]:
+        """
+        Totals per phase name: number of calls, seconds and counters; counters named peak_* keep the maximum,
+        the others are summed.
+        """
+
+        summary = dict()
+        for phase in self.phases:
+            totals = summary.setdefault(phase.name, {'calls': 0, 'seconds': 0.0})
+            totals['calls'] += 1
+            totals['seconds'] += phase.seconds
+            for name, value in phase.counters.items():
+                if name.startswith('peak_'):
+                    totals[name] = max(totals.get(name, value), value)
+                else:
+                    totals[name] = totals.get(name, 0) + value
+        return summary
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(phases={len(self.phases)})'
@@ -0,0 +1,293 @@
+"""
+Regular expressions to automata by the Glushkov (position) construction.
+
+Supported syntax: literals, `.`, classes `[a-z_]` / `[^...]`, escapes `\\d \\w \\s \\D \\W \\S \\n \\t \\r \\f \\v`
+and escaped metacharacters, groups `(...)` / `(?:...)`, alternation `|`, quantifiers `* + ? {m} {m,} {,n} {m,n}`
+(a trailing non-greedy `?` is accepted and ignored, it does not change the language), `^` at the start and `$` at
+the end (words are matched as a whole, so anchors are implied). `.` and negated classes range over `alphabet`.
+"""
+
+import string
+from typing import FrozenSet, Iterable, List, Set, Tuple, Union
+
+from .dfsm import DeterministicFSM
+from .fsm import FSM
+from .lazy import LazyDFA
+from .state import State
+from .transition import Transition
+
+DEFAULT_ALPHABET = string.printable
+MAX_REPEAT = 256
+
+_DIGITS = frozenset(string.digits)
+_WORD = frozenset(string.ascii_letters + string.digits + '_')
+_SPACE = frozenset(' \t\n\r\f\v')
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v'}
+_CLASS_ESCAPES = {'d': (_DIGITS, False), 'w': (_WORD, False), 's': (_SPACE, False),
+                  'D': (_DIGITS, True), 'W': (_WORD, True), 'S': (_SPACE, True)}
+_METACHARACTERS = set('\\.^$|?*+()[]{}-/')
+
+
+def compile(pattern: str, *, alphabet: Iterable[str] = DEFAULT_ALPHABET, determinize: Union[bool, str] = False,
+            minimize: bool = False) -> Union[FSM, DeterministicFSM, LazyDFA]:
+    """
+    Compiles `pattern` to an epsilon-free Glushkov NFA (an FSM with one state per symbol occurrence plus
+    the initial state 0) that accepts exactly the strings fully matching the pattern.
+
+    :param alphabet: characters matched by `.`, negated classes and \\D \\W \\S
+    :param determinize: False (return the NFA), 'eager' or True (DeterministicFSM.from_fsm) or 'lazy' (LazyDFA)
+    :param minimize: minimize the eager DFA (implies determinize='eager')
+    """
+
+    if determinize not in (False, True, 'eager', 'lazy'):
+        raise ValueError(f"Argument `determinize` must be False, True, 'eager' or 'lazy', got: {determinize!r}")
+    if minimize and determinize == 'lazy':
+        raise ValueError('A lazy DFA cannot be minimized')
+    fsm = glushkov(parse(pattern, alphabet))
+    if determinize == 'lazy':
+        return LazyDFA(fsm)
+    if determinize or minimize:
+        dfsm = DeterministicFSM.from_fsm(fsm)
+        return dfsm.minimize() if minimize else dfsm
+    return fsm
+
+
+def parse(pattern: str, alphabet: Iterable[str] = DEFAULT_ALPHABET) -> tuple:
+    """
+    Parses `pattern` into a syntax tree of tuples: ('eps',), ('sym', chars), ('cat', children), ('alt', children),
+    ('star', child), ('plus', child), ('opt', child). Raises ValueError on invalid patterns.
+    """
+
+    return _Parser(pattern, frozenset(alphabet)).parse()
+
+
+def glushkov(node: tuple) -> FSM:
+    """
+    Position automaton of a syntax tree: state 0 is initial, every 'sym' occurrence is a state entered by its
+    characters; follow sets become transitions, so no epsilon transitions are created.
+    """
+
+    classes: List[FrozenSet[str]] = [frozenset()]
+    follow: List[Set[int]] = [set()]
+
+    def visit(node) -> Tuple[bool, Set[int], Set[int]]:
+        kind = node[0]
+        if kind == 'sym':
+            position = len(classes)
+            classes.append(node[1])
+            follow.append(set())
+            return False, {position}, {position}
+        if kind == 'eps':
+            return True, set(), set()
+        if kind == 'cat':
+            nullable, first, last = True, set(), set()
+            for child in node[1]:
+                child_nullable, child_first, child_last = visit(child)
+                for position in last:
+                    follow[position].update(child_first)
+                if nullable:
+                    first.update(child_first)
+                last = last | child_last if child_nullable else child_last
+                nullable = nullable and child_nullable
+            return nullable, first, last
+        if kind == 'alt':
+            nullable, first, last = False, set(), set()
+            for child in node[1]:
+                child_nullable, child_first, child_last = visit(child)
+                nullable = nullable or child_nullable
+                first.update(child_first)
+                last.update(child_last)
+            return nullable, first, last
+        child_nullable, first, last = visit(node[1])
+        if kind in ('star', 'plus'):
+            for position in last:
+                follow[position].update(first)
+        return child_nullable or kind != 'plus', first, last
+
+    nullable, first, last = visit(node)
+    follow[0] = first
+
+    states = [State._trusted(position) for position in range(len(classes))]
+    transitions = dict()
+    fsm = dict()
+    for position, state in enumerate(states):
+        targets = dict()
+        for position_to in follow[position]:
+            for char in classes[position_to]:
+                targets.setdefault(char, set()).add(states[position_to])
+        fsm[state] = {transitions.get(char) or transitions.setdefault(char, Transition(char)): states_to
+                      for char, states_to in targets.items()}
+    final_states = {states[position] for position in last}
+    if nullable:
+        final_states.add(states[0])
+    return FSM._adopt(fsm, {states[0]}, final_states)
+
+
+class _Parser:
+    __slots__ = ('pattern', 'alphabet', 'position')
+
+    def __init__(self, pattern: str, alphabet: FrozenSet[str]):
+        if not isinstance(pattern, str):
+            raise TypeError(f'Pattern must be a str, got: {type(pattern)}')
+        self.pattern = pattern
+        self.alphabet = alphabet
+        self.position = 0
+
+    def error(self, message: str):
+        return ValueError(f'Invalid pattern {self.pattern!r} at position {self.position}: {message}')
+
+    def peek(self) -> str:
+        return self.pattern[self.position] if self.position < len(self.pattern) else ''
+
+    def take(self) -> str:
+        char = self.peek()
+        if not char:
+            raise self.error('unexpected end of pattern')
+        self.position += 1
+        return char
+
+    def parse(self) -> tuple:
+        if self.peek() == '^':
+            self.position += 1
+        node = self.alternation()
+        if self.peek() == ')':
+            raise self.error('unbalanced parenthesis')
+        return node
+
+    def alternation(self) -> tuple:
+        branches = [self.concatenation()]
+        while self.peek() == '|':
+            self.position += 1
+            branches.append(self.concatenation())
+        return branches[0] if len(branches) == 1 else ('alt', branches)
+
+    def concatenation(self) -> tuple:
+        items = []
+        while self.peek() not in ('', '|', ')'):
+            if self.peek() == '$':
+                self.position += 1
+                if self.position != len(self.pattern):
+                    raise self.error('$ is only supported at the end of the pattern')
+                break
+            items.append(self.repetition())
+        if not items:
+            return ('eps',)
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def repetition(self) -> tuple:
+        node = self.atom()
+        quantified = False
+        while self.peek() in ('*', '+', '?', '{'):
+            char = self.peek()
+            if quantified:
+                if char == '?':  # non-greedy marker
+                    self.position += 1
+                    quantified = False
+                    continue
+                raise self.error('multiple repeat')
+            if char == '{':
+                bounds = self.bounds()
+                if bounds is None:
+                    break
+                node = self.repeat(node, *bounds)
+            else:
+                self.position += 1
+                node = ({'*': 'star', '+': 'plus', '?': 'opt'}[char], node)
+            quantified = True
+        return node
+
+    def bounds(self):
+        # {m}, {m,}, {,n}, {m,n}; a '{' that does not start a valid quantifier is a literal, as in Python's re
+        end = self.pattern.find('}', self.position)
+        body = self.pattern[self.position + 1:end] if end != -1 else ''
+        low, comma, high = body.partition(',')
+        if not (low.isdigit() or comma) or (low and not low.isdigit()) or (high and not high.isdigit()):
+            return None
+        low = int(low) if low else 0
+        high = int(high) if high else (None if comma else low)
+        if high is not None and high < low:
+            raise self.error('min repeat greater than max repeat')
+        if max(low, high or 0) > MAX_REPEAT:
+            raise self.error(f'repeat counts are limited to {MAX_REPEAT}')
+        self.position = end + 1
+        return low, high
+
+    @staticmethod
+    def repeat(node: tuple, low: int, high) -> tuple:
+        items = [node] * low
+        if high is None:
+            items.append(('star', node))
+        elif high > low:
+            optional = ('opt', node)
+            for _ in range(high - low - 1):
+                optional = ('opt', ('cat', [node, optional]))
+            items.append(optional)
+        if not items:
+            return ('eps',)
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def atom(self) -> tuple:
+        char = self.take()
+        if char == '(':
+            if self.pattern.startswith('?:', self.position):
+                self.position += 2
+            elif self.peek() == '?':
+                raise self.error('only (?:...) groups are supported')
+            node = self.alternation()
+            if self.take() != ')':
+                raise self.error('missing )')
+            return node
+        if char == '[':
+            return ('sym', self.char_class())
+        if char == '.':
+            return ('sym', self.alphabet)
+        if char == '\\':
+            return ('sym', self.escape())
+        if char in '*+?':
+            raise self.error('nothing to repeat')
+        if char == '^':
+            raise self.error('^ is only supported at the start of the pattern')
+        return ('sym', frozenset(char))
+
+    def escape(self) -> FrozenSet[str]:
+        char = self.take()
+        if char in _CLASS_ESCAPES:
+            chars, negated = _CLASS_ESCAPES[char]
+            return self.alphabet - chars if negated else chars
+        if char in _ESCAPES:
+            return frozenset(_ESCAPES[char])
+        if char in _METACHARACTERS or not char.isalnum():
+            return frozenset(char)
+        raise self.error(f'unsupported escape \\{char}')
+
+    def char_class(self) -> FrozenSet[str]:
+        negated = self.peek() == '^'
+        if negated:
+            self.position += 1
+        chars = set()
+        first = True
+        while True:
+            char = self.take()
+            if char == ']' and not first:
+                break
+            first = False
+            if char == '\\':
+                members = self.escape()
+                if len(members) != 1:
+                    chars.update(members)
+                    continue
+                char = next(iter(members))
+            if self.peek() == '-' and self.pattern[self.position + 1:self.position + 2] not in ('', ']'):
+                self.position += 1
+                end = self.take()
+                if end == '\\':
+                    members = self.escape()
+                    if len(members) != 1:
+                        raise self.error('bad character range')
+                    end = next(iter(members))
+                if end < char:
+                    raise self.error('bad character range')
+                chars.update(map(chr, range(ord(char), ord(end) + 1)))
+            else:
+                chars.add(char)
+        return self.alphabet - chars if negated else frozenset(chars)
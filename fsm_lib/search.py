@@ -0,0 +1,339 @@
+from array import array
+from typing import Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .compiled import DEAD, CompiledDFA, sorted_labels
+from .fsm import FSM
+from .state import State
+from .transition import Transition
+
+Span = Tuple[int, int]
+
+
+class MultiMatcher:
+    """
+    Aho-Corasick automaton of a set of patterns: every (pattern_id, end_offset) occurrence in a text is reported
+    in one pass, one table lookup per symbol. The failure links are resolved into a complete CompiledDFA
+    (`compiled`, state 0 is the root; while scanning, symbols outside the patterns' alphabet lead back to it),
+    and the output lists are stored as two int arrays: the first pattern ending at each state and the link to
+    the nearest proper suffix state with an output. Patterns are sequences of labels (str as characters, bytes
+    as ints, like Matcher); pattern ids are their indexes and end offsets are exclusive (the match is
+    text[end - len(pattern):end]).
+    """
+
+    __slots__ = ('_patterns', '_compiled', '_first_pattern', '_next_pattern', '_output_link')
+
+    def __init__(self, patterns: Iterable[Sequence[Hashable]]):
+        cls_name = self.__class__.__name__
+        patterns = tuple(patterns)
+        goto: List[dict] = [dict()]
+        first_pattern = array('i', [-1])
+        next_pattern = array('i', [-1]) * len(patterns)  # patterns equal to an earlier one are chained
+        last_pattern = dict()
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for symbol in pattern:
+                child = goto[node].get(symbol)
+                if child is None:
+                    child = goto[node][symbol] = len(goto)
+                    goto.append(dict())
+                    first_pattern.append(-1)
+                node = child
+            if not node:
+                raise ValueError(f'{cls_name}. Patterns must not be empty; pattern #{pattern_id} is')
+            if first_pattern[node] == -1:
+                first_pattern[node] = pattern_id
+            else:
+                next_pattern[last_pattern[node]] = pattern_id
+            last_pattern[node] = pattern_id
+
+        symbols = tuple(sorted_labels({symbol for children in goto for symbol in children}))
+        column_of = {symbol: column for column, symbol in enumerate(symbols)}
+        n_states = len(goto)
+        n_symbols = len(symbols)
+        table = array('i', [0]) * (n_states * n_symbols)
+        failure = array('i', [0]) * n_states
+        output_link = array('i', [-1]) * n_states
+        order = [0]
+        for node in order:
+            # the row of a node is the row of its failure state with the trie edges on top; before being
+            # overwritten, the entry of a child's symbol is therefore the child's failure state
+            row = node * n_symbols
+            if node:
+                fail_row = failure[node] * n_symbols
+                table[row:row + n_symbols] = table[fail_row:fail_row + n_symbols]
+            for symbol, child in goto[node].items():
+                column = row + column_of[symbol]
+                fail = failure[child] = table[column]
+                output_link[child] = fail if first_pattern[fail] != -1 else output_link[fail]
+                table[column] = child
+                order.append(child)
+        final_states = [state for state in range(n_states)
+                        if first_pattern[state] != -1 or output_link[state] != -1]
+
+        self._patterns = patterns
+        self._compiled = CompiledDFA(symbols=symbols, table=table, n_states=n_states, initial_state=0,
+                                     final_states=final_states)
+        self._first_pattern = first_pattern
+        self._next_pattern = next_pattern
+        self._output_link = output_link
+
+    @property
+    def patterns(self) -> tuple:
+        return self._patterns
+
+    @property
+    def compiled(self) -> CompiledDFA:
+        """
+        The complete DFA over the patterns' alphabet; it accepts exactly the texts that end with one of the patterns.
+        """
+
+        return self._compiled
+
+    def outputs(self, state: int) -> List[int]:
+        """
+        Ids of the patterns that end when the automaton is in `state`, longest first.
+        """
+
+        first_pattern = self._first_pattern
+        next_pattern = self._next_pattern
+        output_link = self._output_link
+        pattern_ids = []
+        if first_pattern[state] == -1:
+            state = output_link[state]
+        while state != -1:
+            pattern_id = first_pattern[state]
+            while pattern_id != -1:
+                pattern_ids.append(pattern_id)
+                pattern_id = next_pattern[pattern_id]
+            state = output_link[state]
+        return pattern_ids
+
+    def finditer(self, text: Iterable[Hashable]) -> Iterator[Tuple[int, int]]:
+        """
+        Yields (pattern_id, end_offset) for every occurrence, overlapping ones included, by increasing end offset.
+        """
+
+        return self.stream((text,))
+
+    def findall(self, text: Iterable[Hashable]) -> List[Tuple[int, int]]:
+        return list(self.stream((text,)))
+
+    def stream(self, chunks: Iterable[Iterable[Hashable]]) -> Iterator[Tuple[int, int]]:
+        """
+        finditer over a text split in chunks (e.g. blocks of a large file); occurrences spanning chunk boundaries
+        are found and end offsets count from the start of the first chunk.
+        """
+
+        compiled = self._compiled
+        table = compiled._table
+        final_flags = compiled._final_flags
+        column_of = compiled._symbol_index
+        n_symbols = len(compiled._symbols)
+        outputs = self.outputs
+        state = 0
+        offset = 0
+        for chunk in chunks:
+            for symbol in chunk:
+                offset += 1
+                column = column_of.get(symbol)
+                if column is None:
+                    state = 0
+                    continue
+                state = table[state * n_symbols + column]
+                if final_flags[state]:
+                    for pattern_id in outputs(state):
+                        yield pattern_id, offset
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(patterns={len(self._patterns)}, states={self._compiled.n_states})'
+
+
+class Searcher:
+    """
+    Unanchored search with a CompiledDFA: finds the (start, end) spans of the substrings text[start:end] that
+    the DFA accepts, without copying substrings. One backward pass with the reverse DFA (FSM.reverse of the
+    automaton preceded by a loop on every symbol, determinized) marks every position where a match starts;
+    each match end is then found by an anchored forward scan from the leftmost marked start. In longest mode
+    the scans remember the last end reachable from every (position, state) pair they visit, so overlapping
+    scans stop where an earlier one already went and the whole search stays linear in the text length.
+
+    With longest=True a match is leftmost-longest; with longest=False it is leftmost-first, which for a DFA
+    (no alternation priorities) is the leftmost start with the first end reached (the shortest match).
+    Texts are sequences (str, bytes, list, ...) indexed like Matcher input; the reverse DFA is built on first use.
+    """
+
+    __slots__ = ('_compiled', '_reverse')
+
+    def __init__(self, compiled: CompiledDFA):
+        cls_name = self.__class__.__name__
+        if not isinstance(compiled, CompiledDFA):
+            raise TypeError(f'{cls_name}. Argument must be an object of class CompiledDFA, got: {type(compiled)}')
+        self._compiled = compiled
+        self._reverse = None
+
+    @property
+    def compiled(self) -> CompiledDFA:
+        return self._compiled
+
+    @property
+    def reverse(self) -> CompiledDFA:
+        """
+        DFA reading a text backwards that is in a final state exactly at the positions where a match starts.
+        """
+
+        if self._reverse is None:
+            self._reverse = _unanchored_reverse(self._compiled)
+        return self._reverse
+
+    def fullmatch(self, text: Iterable[Hashable]) -> Optional[Span]:
+        """
+        (0, n) if the whole text is in the language, n being the number of symbols read, None otherwise.
+        Unlike search, any iterable is accepted; it is read once.
+        """
+
+        compiled = self._compiled
+        table = compiled._table
+        column_of = compiled._symbol_index
+        n_symbols = len(compiled._symbols)
+        state = compiled._initial_state
+        if state == DEAD:
+            return None
+        length = 0
+        for symbol in text:
+            length += 1
+            column = column_of.get(symbol)
+            if column is None:
+                return None
+            state = table[state * n_symbols + column]
+            if state == DEAD:
+                return None
+        return (0, length) if compiled._final_flags[state] else None
+
+    def search(self, text: Sequence[Hashable], longest: bool = True) -> Optional[Span]:
+        """
+        Leftmost match as a (start, end) span, None if there is none.
+        """
+
+        return next(self.finditer(text, longest), None)
+
+    def finditer(self, text: Sequence[Hashable], longest: bool = True) -> Iterator[Span]:
+        """
+        Yields the spans of successive non-overlapping matches from left to right; after an empty match the
+        search resumes one position further (as re.finditer does).
+        """
+
+        if self._compiled.initial_state == DEAD:
+            return
+        starts = self.starts(text)
+        # longest ends already known for (position, state) pairs visited by earlier forward scans, so the scans
+        # together read every (position, state) pair at most once: linear in len(text) for a given DFA
+        known_ends = dict() if longest else None
+        frontier = 0
+        position = 0
+        while True:
+            start = starts.find(1, position)
+            if start == -1:
+                return
+            if longest and start >= frontier:
+                known_ends.clear()  # no later scan can reach the pairs visited so far
+            end, reached = self._match_end(text, start, known_ends)
+            frontier = max(frontier, reached)
+            yield start, end
+            position = end if end > start else end + 1
+
+    def starts(self, text: Sequence[Hashable]) -> bytearray:
+        """
+        Flags of the positions 0..len(text) where some match starts (one backward pass).
+        """
+
+        reverse = self.reverse
+        table = reverse._table
+        final_flags = reverse._final_flags
+        column_of = reverse._symbol_index
+        n_symbols = len(reverse._symbols)
+        initial_state = state = reverse._initial_state
+        starts = bytearray(len(text) + 1)
+        starts[-1] = final_flags[state]
+        for position in range(len(text) - 1, -1, -1):
+            column = column_of.get(text[position])
+            # the reverse DFA is complete over the alphabet; any other symbol cannot be inside a match
+            state = initial_state if column is None else table[state * n_symbols + column]
+            starts[position] = final_flags[state]
+        return starts
+
+    def _match_end(self, text: Sequence[Hashable], start: int, known_ends: Optional[dict]) -> Tuple[int, int]:
+        """
+        Anchored forward scan from a marked start: the first end reached, or with `known_ends` (a dict
+        position * n_states + state -> last end reachable from that pair, -1 if none) the last one.
+        Returns the end and the last position read.
+        """
+
+        compiled = self._compiled
+        table = compiled._table
+        final_flags = compiled._final_flags
+        column_of = compiled._symbol_index
+        n_symbols = len(compiled._symbols)
+        n_states = compiled._n_states
+        state = compiled._initial_state
+        if known_ends is None and final_flags[state]:
+            return start, start
+        end = -1
+        path = []
+        position = start
+        for position in range(start + 1, len(text) + 1):
+            column = column_of.get(text[position - 1])
+            if column is None:
+                break
+            state = table[state * n_symbols + column]
+            if state == DEAD:
+                break
+            if known_ends is None:
+                if final_flags[state]:
+                    return position, position
+                continue
+            key = position * n_states + state
+            end = known_ends.get(key, -2)
+            if end != -2:
+                break
+            path.append(key)
+            end = -1
+        if known_ends is not None:
+            for key in reversed(path):
+                if end == -1 and final_flags[key % n_states]:
+                    end = key // n_states
+                known_ends[key] = end
+        if end == -1:
+            end = start  # the start is marked, so if no longer match exists the empty word is accepted
+        return end, position
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(compiled={self._compiled!r})'
+
+
+def _unanchored_reverse(compiled: CompiledDFA) -> CompiledDFA:
+    """
+    Determinized reversal of A preceded by a new initial state that loops on every symbol and has epsilon
+    transitions to the final states of A, i.e. the DFA of Σ* · reverse(L(A)).
+    """
+
+    n_states = compiled.n_states
+    n_symbols = compiled.n_symbols
+    table = compiled._table
+    states = [State._trusted(state) for state in range(n_states + 1)]
+    transitions = [Transition._trusted(symbol) for symbol in compiled.symbols]
+    forward = FSM._adopt({states[state]: {transitions[column]: states[state_to] for column, state_to
+                                          in enumerate(table[state * n_symbols:(state + 1) * n_symbols])
+                                          if state_to != DEAD}
+                          for state in range(n_states)},
+                         {states[compiled.initial_state]} if compiled.initial_state != DEAD else set(),
+                         {states[state] for state in compiled.final_states})
+    reverse = forward.reverse()
+    anywhere = states[n_states]
+    fsm = reverse._fsm
+    fsm[anywhere] = {transition: {anywhere} for transition in transitions}
+    fsm[anywhere][Transition(None)] = reverse._initial_states
+    unanchored = FSM._adopt(fsm, {anywhere}, reverse._final_states)
+    return CompiledDFA.from_fsm(unanchored.eliminate_epsilon_transitions())
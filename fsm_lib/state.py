@@ -3,7 +3,7 @@ from typing import Hashable
 
 
 class State:
-    __slots__ = ('_uid',)
+    __slots__ = ('_uid', '_hash')
 
     def __init__(self, uid: Hashable):
         self.uid = uid
@@ -22,6 +22,24 @@ class State:
         _ = str(value)  # `value` must easily cast to str without throwing an exception
         _ = repr(value)
         self._uid = value
+        self._hash = hash((value,))
+
+    @classmethod
+    def _trusted(cls, uid: Hashable):
+        """
+        Constructor without validation, for values produced by the library itself.
+        """
+        obj = object.__new__(cls)
+        obj._uid = uid
+        obj._hash = hash((uid,))
+        return obj
+
+    def __getstate__(self):
+        return (self._uid,)
+
+    def __setstate__(self, state):
+        self._uid = state[0]
+        self._hash = hash(state)
 
     def copy(self):
         return self.__class__(self.uid)
@@ -38,6 +56,8 @@ class State:
         return self.uid is not None
 
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         try:
             return self.uid == other.uid if isinstance(other, self.__class__) else False
         except:
@@ -68,7 +88,7 @@ class State:
             return str(self.uid) <= str(other.uid)
 
     def __hash__(self) -> int:
-        return hash((self.uid,))
+        return self._hash
 
     def __contains__(self, item):
         item_uid = item.uid if isinstance(item, State) else item
@@ -1,9 +1,23 @@
 import collections
+import itertools
+import pickle
+import random
+import re
 import string
+import struct
+import tempfile
+import time
 import unittest
+from array import array
 from copy import deepcopy
 
-from fsm_lib import FSM, DeterministicFSM
+from fsm_lib import AutomatonCache, FSM, DeterministicFSM, CompiledDFA, CompiledNFA, CompressedDFA, LazyDFA, Matcher, \
+    MultiMatcher, State, Transition
+from fsm_lib.generator import iter_random_edges, random_dfa
+from fsm_lib.interned import InternedFSM
+from fsm_lib.profiling import Profile
+from fsm_lib import regex
+from fsm_lib.compiled import _HEADER
 from utils import is_dfa_equals, is_dfa_isomorphic
 
 
@@ -465,6 +479,738 @@ class DeterminationTests(unittest.TestCase):
                 print('Actual:', *minimal_dfsm_2.to_original())
             self.assertTrue(r, 'Not equals')
 
+    def test_large_minimization(self):
+        print('Minimization of a 100k-state DFA made of two interleaved copies of a random DFA')
+        n = 50000
+        base = random_dfa(n, 2, seed=7)
+        rng = random.Random(7)
+        # state i + n repeats the row of state i; every transition goes to either copy of its target
+        table = array('i', [state + n * rng.getrandbits(1) for state in base._table]) * 2
+        doubled = CompiledDFA(symbols=base.symbols, table=table, n_states=2 * n, initial_state=0,
+                              final_states=base.final_states | {state + n for state in base.final_states})
+        dfsm = DeterministicFSM.from_compiled(doubled)
+        started = time.perf_counter()
+        minimal = dfsm.minimize()
+        self.assertLess(time.perf_counter() - started, 60)  # seconds here, minutes for a quadratic pipeline
+        self.assertEqual(len(minimal.get_states()), len(DeterministicFSM.from_compiled(base).minimize().get_states()))
+        self.assertTrue(minimal.equivalent(dfsm))
+
+
+class InterningTests(unittest.TestCase):
+
+    def test_interned_fsm(self):
+        print('Interned FSM: integer states and symbols')
+        nfa = {
+            '0': {'a': {'0', '1'}, 'ε': '2'},
+            '1': {'b': '3'},
+            '2': {}
+        }
+        interned = InternedFSM(FSM.from_original(nfa, {'0'}, {'3'}))
+        self.assertEqual(len(interned), 4)
+        self.assertEqual(sorted(interned.labels), ['a', 'b'])
+        self.assertTrue(interned.has_epsilon_transitions())
+        zero = interned.state_index[State('0')]
+        a = interned.symbol_index[Transition('a')]
+        self.assertEqual({interned.states[i].uid for i in interned.delta[zero][a]}, {'0', '1'})
+        self.assertEqual([interned.states[i].uid for i in interned.epsilon[zero]], ['2'])
+        self.assertEqual(interned.initial_states, [zero])
+        self.assertEqual({interned.states[i].uid for i in interned.final_states}, {'3'})
+
+    def test_cached_hash(self):
+        print('State and Transition keep their hash across copies and uid changes')
+        state = State('x')
+        self.assertEqual(hash(pickle.loads(pickle.dumps(state))), hash(state))
+        self.assertEqual(hash(deepcopy(Transition('a'))), hash(Transition('a')))
+        state.uid += "'"
+        self.assertEqual(hash(state), hash(State("x'")))
+        self.assertEqual(state, State("x'"))
+
+
+class ConstructionTests(unittest.TestCase):
+
+    def test_copy_and_adopt(self):
+        print('Copy-free construction')
+        fsm = FSM.from_original({'0': {'a': {'0', '1'}}, '1': {}}, {'0'}, {'1'})
+        copied = fsm.copy()
+        self.assertEqual(copied, fsm)
+        copied.add_transition(State('1'), Transition('b'), State('0'))
+        copied.set_final_state(State('0'))
+        self.assertNotEqual(copied, fsm)
+        self.assertFalse(fsm.accepts('ab'))
+        self.assertTrue(copied.accepts('ab'))
+        copied = fsm.copy()
+        copied_state = next(iter(copied._initial_states))
+        self.assertIsNot(copied_state, next(iter(fsm._initial_states)))
+        self.assertTrue(any(state is copied_state for state in copied._fsm[copied_state][Transition('a')]))
+        copied_transition = next(iter(copied._fsm[copied_state]))
+        copied_state.uid = '2'
+        copied_transition.label = 'c'
+        self.assertEqual({state.uid for state in fsm._initial_states}, {'0'})
+        self.assertTrue(fsm.accepts('a'))
+        graph = {State('0'): {Transition('a'): State('1')}, State('1'): dict()}
+        adopted = DeterministicFSM._adopt(graph, {State('0')}, {State('1')})
+        self.assertIs(adopted._fsm, graph)
+        self.assertTrue(adopted.accepts('a'))
+        with self.assertRaises(TypeError):
+            DeterministicFSM._adopt({State('0'): {Transition('a'): {State('1')}}}, set(), set(), check=True)
+
+    def test_epsilon_cycles(self):
+        print('Epsilon closures through cycles and chains')
+        nfa = {
+            '0': {'ε': '1'},
+            '1': {'ε': {'2', '0'}, 'a': '1'},
+            '2': {'b': '3', 'epsilon': '0'},
+            '3': {'ε': '4'},
+            '4': {}
+        }
+        fsm = FSM.from_original(nfa, {'0'}, {'4'}).eliminate_epsilon_transitions()
+        self.assertEqual({state.uid for state in fsm._initial_states}, {'0', '1', '2'})
+        self.assertEqual({state.uid for state in fsm._final_states}, {'3', '4'})
+        for state in ('0', '1', '2'):
+            transitions = fsm._fsm[State(state)]
+            self.assertEqual({transition.label for transition in transitions}, {'a', 'b'})
+            self.assertEqual(transitions[Transition('a')], {State('1')})
+            self.assertEqual(transitions[Transition('b')], {State('3')})
+        for word, expected in (('', False), ('b', True), ('aab', True), ('ba', False)):
+            self.assertEqual(fsm.accepts(word), expected)
+
+
+class RunTests(unittest.TestCase):
+
+    def test_nfa_run(self):
+        print('Running NFA with epsilon transitions')
+        nfa = {
+            '0': {'a': {'0', '1'}, 'ε': '2'},
+            '1': {'b': '3'},
+            '2': {'c': '3'},
+            '3': {'epsilon': '4'},
+            '4': {}
+        }
+        fsm = FSM.from_original(nfa, {'0'}, {'4'})
+        self.assertEqual({state.uid for state in fsm.run('')}, {'0', '2'})
+        self.assertEqual({state.uid for state in fsm.run('ab')}, {'3', '4'})
+        self.assertEqual(fsm.run('ba'), set())
+        self.assertTrue(fsm.accepts('c'))
+        self.assertTrue(fsm.accepts('aaab'))
+        self.assertTrue(fsm.accepts('aac'))
+        self.assertFalse(fsm.accepts('aa'))
+        self.assertFalse(fsm.accepts('abc'))
+
+    def test_dfa_run(self):
+        print('Running DFA')
+        dfa = {
+            '1': {'a': '2', 'b': '3'},
+            '2': {'a': '2', 'b': '3'},
+            '3': {'a': '4', 'b': '4'},
+            '4': {}
+        }
+        dfsm = DeterministicFSM.from_original(dfa, {'1'}, {'4'}, name_of_state_generator=None)
+        self.assertEqual(dfsm.run('aab').uid, '3')
+        self.assertIsNone(dfsm.run('abab'))
+        self.assertTrue(dfsm.accepts('aaba'))
+        self.assertFalse(dfsm.accepts('aab'))
+        self.assertFalse(dfsm.accepts('x'))
+        for word in ('', 'a', 'ab', 'abb', 'bab', 'aaabb'):
+            self.assertEqual(dfsm.accepts(word), dfsm.compile().accepts(word))
+
+
+class ProductTests(unittest.TestCase):
+
+    def test_product_operations(self):
+        print('Product construction: intersection, union, difference, symmetric difference')
+        words = [''.join(word) for n in range(6) for word in itertools.product('abc', repeat=n)]
+        for _ in range(100):
+            dfsm_1, dfsm_2 = (DeterministicFSM.from_fsm(FSM.generate(
+                deterministic=False, states_alphabet=range(1000), min_states=0, max_states=6,
+                transitions_alphabet='ab' if i else 'abc', min_transitions_from_state=0, max_transitions_from_state=3,
+                min_initial_states=0, max_initial_states=2, min_final_states=0, max_final_states=3)) for i in range(2))
+            operations = (
+                (dfsm_1.intersection(dfsm_2), lambda x, y: x and y),
+                (dfsm_1.union(dfsm_2, minimize=True), lambda x, y: x or y),
+                (dfsm_1.difference(dfsm_2), lambda x, y: x and not y),
+                (dfsm_1.symmetric_difference(dfsm_2), lambda x, y: x != y),
+            )
+            for product, operation in operations:
+                self.assertIsInstance(product, DeterministicFSM)
+                self.assertLessEqual(len(product._initial_states), 1)
+                for word in words:
+                    self.assertEqual(product.accepts(word), operation(dfsm_1.accepts(word), dfsm_2.accepts(word)))
+
+
+class FromWordsTests(unittest.TestCase):
+
+    def test_random_word_lists(self):
+        print('Daciuk construction from word lists')
+        rng = random.Random(5)
+        for _ in range(100):
+            words = {''.join(rng.choice('abc') for _ in range(rng.randint(0, 6))) for _ in range(rng.randint(0, 30))}
+            dfsm = DeterministicFSM.from_words(sorted(words))
+            self.assertEqual(dfsm, DeterministicFSM.from_words(list(words), sorted=False))
+            trie = {'': {}}
+            for word in words:
+                for i in range(len(word)):
+                    trie[word[:i]][word[i]] = word[:i + 1]
+                    trie.setdefault(word[:i + 1], {})
+            minimal = DeterministicFSM.from_original(trie, {''}, words).minimize()
+            self.assertTrue(dfsm.equivalent(minimal))
+            if words:
+                self.assertEqual(len(dfsm.get_states()), len(minimal.get_states()))
+            for word in words | {'ab', 'cc', 'abcabc'}:
+                self.assertEqual(dfsm.accepts(word), word in words)
+
+    def test_unsorted(self):
+        print('Daciuk construction rejects unsorted input')
+        with self.assertRaises(ValueError):
+            DeterministicFSM.from_words(['b', 'a'])
+        dfsm = DeterministicFSM.from_words(iter([(1, 2), (1, 2), (1, 3)]))
+        self.assertTrue(dfsm.accepts((1, 3)) and not dfsm.accepts((1,)))
+
+
+class EquivalenceTests(unittest.TestCase):
+
+    def test_random_equivalence_and_inclusion(self):
+        print('Hopcroft-Karp equivalence and antichain inclusion random tests')
+        words = [''.join(word) for n in range(6) for word in itertools.product('ab', repeat=n)]
+        for _ in range(200):
+            fsm_1, fsm_2 = (FSM.generate(
+                deterministic=False, states_alphabet=range(1000), min_states=0, max_states=5,
+                transitions_alphabet='εab', min_transitions_from_state=0, max_transitions_from_state=3,
+                min_initial_states=0, max_initial_states=2, min_final_states=0, max_final_states=3) for _ in range(2))
+            dfsm_1, dfsm_2 = DeterministicFSM.from_fsm(fsm_1), DeterministicFSM.from_fsm(fsm_2)
+            self.assertTrue(dfsm_1.equivalent(dfsm_1.minimize()))
+            self.assertTrue(fsm_1.is_subset_of(dfsm_1) and dfsm_1.is_subset_of(fsm_1))
+            for first, second in ((fsm_1, fsm_2), (dfsm_1, dfsm_2)):
+                result, word = first.is_subset_of(second, counterexample=True)
+                expected = not any(first.accepts(w) and not second.accepts(w) for w in words)
+                if result:
+                    self.assertTrue(expected)
+                else:
+                    self.assertTrue(first.accepts(word) and not second.accepts(word))
+            result, word = dfsm_1.equivalent(dfsm_2, counterexample=True)
+            if result:
+                self.assertTrue(all(dfsm_1.accepts(w) == dfsm_2.accepts(w) for w in words))
+            else:
+                self.assertNotEqual(dfsm_1.accepts(word), dfsm_2.accepts(word))
+
+    def test_counterexample(self):
+        print('Counterexample of inclusion')
+        ends_with_ab = DeterministicFSM.from_original({'0': {'a': {'0', '1'}, 'b': '0'}, '1': {'b': '2'}, '2': {}},
+                                                      {'0'}, {'2'})
+        ends_with_b = DeterministicFSM.from_original({'0': {'a': '0', 'b': '1'}, '1': {'a': '0', 'b': '1'}},
+                                                     {'0'}, {'1'})
+        self.assertTrue(ends_with_ab.is_subset_of(ends_with_b))
+        self.assertEqual(ends_with_b.is_subset_of(ends_with_ab, counterexample=True), (False, ('b',)))
+        self.assertEqual(ends_with_b.equivalent(ends_with_ab, counterexample=True), (False, ('b',)))
+        self.assertTrue(ends_with_ab.equivalent(ends_with_ab.union(ends_with_ab)))
+
+
+class GeneratorTests(unittest.TestCase):
+
+    def test_random_dfa(self):
+        print('Random DFA tables')
+        backends = [False]
+        try:
+            import numpy  # noqa: F401
+            backends.append(True)
+        except ImportError:
+            pass
+        for use_numpy in backends:
+            for seed in range(20):
+                compiled = random_dfa(50, 'ab', density=0.3, seed=seed, use_numpy=use_numpy)
+                self.assertEqual(compiled.fingerprint(),
+                                 random_dfa(50, 'ab', density=0.3, seed=random.Random(seed),
+                                            use_numpy=use_numpy).fingerprint())
+                self.assertEqual(compiled.canonical().n_states, 50)
+                sparse = random_dfa(50, 'ab', density=0.2, reachable=False, accessible_only=True, seed=seed,
+                                    use_numpy=use_numpy)
+                self.assertEqual(sparse.canonical().n_states, sparse.n_states)
+                dfsm = DeterministicFSM.from_compiled(compiled, None)
+                self.assertEqual(dfsm.fingerprint(), compiled.fingerprint())
+        with self.assertRaises(ValueError):
+            random_dfa(2, (), seed=0)
+
+    def test_streaming_edges_and_seed(self):
+        print('Streaming random edges and seeded FSM.generate')
+        edges = list(iter_random_edges(100, 'abc', density=0.5, seed=1))
+        self.assertEqual(edges, list(iter_random_edges(100, 'abc', density=0.5, seed=1)))
+        fsm = FSM.from_original({state: {} for state in range(100)}, {0}, set())
+        for state_from, label, state_to in edges:
+            fsm.add_transition(State(state_from), Transition(label), State(state_to))
+        self.assertEqual(len(DeterministicFSM.from_fsm(fsm).get_states()), 100)
+        arguments = (True, range(100), 1, 50, 'abc', 0, 3, 1, 1, 0, 10)
+        self.assertEqual(FSM.generate(*arguments, seed=7), FSM.generate(*arguments, seed=7))
+
+
+class ProfilingTests(unittest.TestCase):
+
+    def test_phases(self):
+        print('Profiling phases of the pipelines')
+        fsm = FSM.from_original({'0': {'a': {'0', '1'}, 'b': '0', 'ε': '2'}, '1': {'b': '2'}, '2': {}}, {'0'}, {'2'})
+        finished = []
+        with Profile(callback=finished.append) as profile:
+            dfsm = DeterministicFSM.from_fsm(fsm)
+            dfsm.minimize()
+            dfsm._brzozowski()
+        self.assertEqual(finished, profile.phases)
+        summary = profile.summary()
+        self.assertTrue({'eliminate_epsilon_transitions', 'from_fsm.subset_construction', 'minimize.refine',
+                         'brzozowski.reverse_1', 'brzozowski.determinize_1', 'brzozowski.reverse_2',
+                         'brzozowski.determinize_2'}.issubset(summary))
+        first = next(phase for phase in profile.phases if phase.name == 'from_fsm.subset_construction')
+        self.assertEqual(first.counters['nfa_states'], 3)
+        self.assertEqual(first.counters['dfa_states'], len(dfsm.get_states()))
+        self.assertEqual(first.counters['peak_subset_size'], 2)
+        self.assertGreater(summary['minimize.refine']['splitters'], 0)
+        dfsm.minimize()
+        self.assertEqual(len(profile.phases), len(finished))
+
+
+class TrimTests(unittest.TestCase):
+
+    def test_random_trim(self):
+        print('Accessible, coaccessible and trim random tests')
+        words = [''.join(word) for n in range(6) for word in itertools.product('ab', repeat=n)]
+        for _ in range(200):
+            fsm = FSM.generate(
+                deterministic=False, states_alphabet=range(1000), min_states=0, max_states=8,
+                transitions_alphabet='ab', min_transitions_from_state=0, max_transitions_from_state=2,
+                min_initial_states=0, max_initial_states=2, min_final_states=0, max_final_states=2)
+            trimmed = fsm.trim()
+            self.assertTrue(all(fsm.accepts(word) == trimmed.accepts(word) for word in words))
+            self.assertEqual(trimmed.get_states(), fsm.accessible_states() & fsm.coaccessible_states()
+                             if fsm.accessible_states() & fsm.coaccessible_states() & fsm._final_states else set())
+            self.assertEqual(trimmed.accessible_states(), trimmed.get_states())
+            self.assertEqual(trimmed.coaccessible_states(), trimmed.get_states())
+            self.assertEqual(fsm.accessible().get_states(), fsm.accessible_states())
+            self.assertEqual(fsm.coaccessible().get_states(), fsm.coaccessible_states())
+
+    def test_incremental_reverse_index(self):
+        print('Incremental reverse index')
+        fsm = FSM.generate(deterministic=False, states_alphabet=range(1000), min_states=20, max_states=20,
+                           transitions_alphabet='abc', min_transitions_from_state=0, max_transitions_from_state=3,
+                           min_initial_states=1, max_initial_states=2, min_final_states=1, max_final_states=3, seed=3)
+        fsm.enable_reverse_index()
+        rng = random.Random(3)
+        states = sorted(fsm.get_states(), key=lambda state: state.uid)
+        labels = [Transition(label) for label in 'abc']
+        for _ in range(500):
+            state_from, state_to = rng.choice(states), rng.choice(states)
+            action = rng.randrange(5)
+            if action == 0:
+                fsm.add_transition(state_from, rng.choice(labels), state_to)
+            elif action == 1:
+                fsm.set_transitions(state_from, rng.choice(labels), set(rng.sample(states, 2)))
+            elif action == 2:
+                fsm.set_transition(state_from, rng.choice(labels), state_to)
+            elif action == 3:
+                fsm.remove_transition(state_from, rng.choice(labels), state_to)
+            elif state_from in fsm.get_states() and len(fsm.get_states()) > 10:
+                fsm.remove_state(state_from)
+            self.assertEqual(fsm._reverse_index, fsm._build_reverse_index())
+        self.assertEqual(fsm.coaccessible_states(), fsm.copy().coaccessible_states())
+
+        dfsm = DeterministicFSM.from_original({0: {'a': 1}, 1: {}, 2: {'a': 0}}, {0}, {1}, None)
+        dfsm.enable_reverse_index()
+        dfsm.add_transition(State(1), Transition('b'), State(2))
+        self.assertEqual(dfsm._reverse_index, dfsm._build_reverse_index())
+        self.assertEqual(dfsm.trim().get_states(), {State(0), State(1)})
+        self.assertIsInstance(dfsm.trim(), DeterministicFSM)
+
+
+class RegexTests(unittest.TestCase):
+
+    def test_glushkov_matches_re(self):
+        print('Regex: Glushkov NFA, eager/minimized and lazy DFAs agree with re.fullmatch')
+        alphabet = 'abc1.-'
+        patterns = ['(a|b)*abb', 'a{2,4}c?', '[a-c]+1{,2}', '[^ab]\\.', '(?:ab|a)*', '', 'a|', '\\d+\\.\\d*',
+                    'a.c', '^(ab)+$', 'a+?b', '[\\-a]*', 'x{0}b']
+        rng = random.Random(0)
+        words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))) for _ in range(500)]
+        for pattern in patterns:
+            nfa = regex.compile(pattern, alphabet=alphabet)
+            self.assertIsInstance(nfa, FSM)
+            self.assertFalse(any(transition.is_epsilon()
+                                 for transitions in nfa.fsm_deepcopy().values() for transition in transitions))
+            engines = [nfa, regex.compile(pattern, alphabet=alphabet, determinize='eager'),
+                       regex.compile(pattern, alphabet=alphabet, minimize=True),
+                       regex.compile(pattern, alphabet=alphabet, determinize='lazy')]
+            self.assertIsInstance(engines[1], DeterministicFSM)
+            self.assertIsInstance(engines[3], LazyDFA)
+            for word in words:
+                expected = re.fullmatch(pattern, word) is not None
+                for engine in engines:
+                    self.assertEqual(engine.accepts(word), expected, (pattern, word, engine))
+
+    def test_invalid_patterns(self):
+        print('Regex: invalid patterns')
+        for pattern in ['(a', 'a)', '*a', 'a**', '[a', 'a{3,2}', '\\q', '(?=a)', 'a^', '$a']:
+            with self.assertRaises(ValueError, msg=pattern):
+                regex.compile(pattern)
+
+
+class CanonicalTests(unittest.TestCase):
+
+    def test_isomorphic_dfsms(self):
+        print('Canonical form and fingerprint of isomorphic DFAs')
+        for _ in range(200):
+            fsm = FSM.generate(
+                deterministic=True, states_alphabet=range(1000), min_states=1, max_states=8,
+                transitions_alphabet='abc', min_transitions_from_state=0, max_transitions_from_state=3,
+                min_initial_states=1, max_initial_states=1, min_final_states=0, max_final_states=3)
+            dfsm = DeterministicFSM.from_fsm(fsm)
+            original, initial_states, final_states = dfsm.to_original()
+            renaming = dict(zip(original, random.sample(range(1000), len(original))))
+            items = list(original.items())
+            random.shuffle(items)
+            renamed = DeterministicFSM.from_original(
+                {renaming[state]: {label: renaming[state_to] for label, state_to in transitions.items()}
+                 for state, transitions in items},
+                {renaming[state] for state in initial_states}, {renaming[state] for state in final_states},
+                name_of_state_generator=None)
+            self.assertEqual(dfsm.canonical(), renamed.canonical())
+            self.assertEqual(hash(dfsm.canonical()), hash(renamed.canonical()))
+            self.assertEqual(dfsm.fingerprint(), renamed.fingerprint())
+            self.assertEqual(dfsm.minimize().fingerprint(), renamed.minimize().fingerprint())
+            self.assertTrue(dfsm.canonical().equivalent(dfsm))
+
+    def test_fingerprint_distinguishes(self):
+        print('Fingerprint of different DFAs')
+        a = DeterministicFSM.from_original({0: {'a': 1}, 1: {}}, {0}, {1})
+        b = DeterministicFSM.from_original({0: {'b': 1}, 1: {}}, {0}, {1})
+        c = DeterministicFSM.from_original({0: {'a': 1}, 1: {}}, {0}, {0})
+        self.assertEqual(len({a.fingerprint(), b.fingerprint(), c.fingerprint()}), 3)
+        self.assertEqual(DeterministicFSM().fingerprint(), DeterministicFSM().canonical().fingerprint())
+
+
+class CompressionTests(unittest.TestCase):
+
+    def test_byte_classes(self):
+        print('Alphabet compression: byte DFA with 256 symbols and 3 classes')
+        digits = range(48, 58)
+        fsm = {0: {byte: 1 for byte in range(256)},
+               1: {byte: 2 if byte in digits else 1 for byte in range(256) if byte != 10},
+               2: {byte: 2 for byte in digits}}
+        dfsm = DeterministicFSM.from_original(fsm, {0}, {2})
+        compiled = dfsm.compile()
+        compressed = compiled.compress()
+        self.assertIsInstance(compressed, CompressedDFA)
+        self.assertEqual(compressed.n_classes, 3)
+        self.assertEqual(sorted(map(len, compiled.symbol_classes())), [1, 10, 245])
+        self.assertEqual([compressed.class_of(byte) for byte in (0, 10, 48, 57, 255)], [0, 1, 2, 2, 0])
+        self.assertEqual(compressed.class_of(256), -1)
+        self.assertEqual(compressed.fingerprint(), compiled.fingerprint())
+        self.assertEqual(list(compressed.decompress()._table), list(compiled._table))
+        for word in [b'', b'x', b'x1', b'\n12', b'ab\n3', b'a12', b'a1b2', bytes(range(256))]:
+            self.assertEqual(compressed.accepts(word), dfsm.accepts(word), word)
+            self.assertEqual(compressed.accepts(list(word)), dfsm.accepts(word), word)
+        matcher = Matcher(compressed)
+        self.assertFalse(matcher.feed(b'ab'))
+        self.assertTrue(matcher.feed(b'12'))
+        self.assertTrue(dfsm.minimize().equivalent(dfsm))
+        self.assertEqual(len(dfsm.minimize().get_states()), 3)
+
+
+class CompiledDFATests(unittest.TestCase):
+
+    def test_compile(self):
+        print('Compiled DFA: renumbering, missing edges and matching')
+        dfa = {
+            '1': {'a': '2', 'b': '3'},
+            '2': {'a': '2', 'b': '3'},
+            '3': {'a': '4', 'b': '4'},
+            '4': {}
+        }
+        compiled = DeterministicFSM.from_original(dfa, {'1'}, {'4'}).compile()
+        self.assertIsInstance(compiled, CompiledDFA)
+        self.assertEqual(compiled.n_states, 4)
+        self.assertEqual(set(compiled.symbols), {'a', 'b'})
+        self.assertEqual(compiled.initial_state, 0)
+        self.assertEqual(len(compiled.final_states), 1)
+        self.assertTrue(compiled.accepts('aba'))
+        self.assertTrue(compiled.accepts('aaabb'))
+        self.assertFalse(compiled.accepts('aab'))
+        self.assertFalse(compiled.accepts('abaa'))
+        self.assertFalse(compiled.accepts('abc'))
+        self.assertEqual(compiled.run('abaa'), CompiledDFA.DEAD)
+
+    def test_compile_several_initial_states(self):
+        print('Compiled DFA: several initial states')
+        dfa = {
+            '1': {'a': '2'},
+            '2': {},
+            '3': {'b': '4'},
+            '4': {}
+        }
+        fsm_obj = FSM.from_original(dfa, {'1', '3'}, {'2', '4'})
+        compiled = DeterministicFSM(fsm=fsm_obj._fsm, initial_states=fsm_obj._initial_states,
+                                    final_states=fsm_obj._final_states).compile()
+        self.assertTrue(compiled.accepts('a'))
+        self.assertTrue(compiled.accepts('b'))
+        self.assertFalse(compiled.accepts(''))
+        self.assertFalse(compiled.accepts('ab'))
+        empty = DeterministicFSM().compile()
+        self.assertEqual(empty.n_states, 0)
+        self.assertFalse(empty.accepts(''))
+
+    def test_compile_direct_path(self):
+        print('Compiled DFA: deterministic inputs are numbered directly, other ones go through subsets')
+        compiled = random_dfa(300, 3, density=0.7, reachable=False, seed=5)
+        dfsm = DeterministicFSM.from_compiled(compiled)
+        self.assertEqual(dfsm.compile().fingerprint(), compiled.fingerprint())
+        singletons = FSM(fsm={state: {transition: {state_to} for transition, state_to in transitions.items()}
+                              for state, transitions in dfsm._fsm.items()},
+                         initial_states=dfsm._initial_states, final_states=dfsm._final_states)
+        self.assertEqual(CompiledDFA.from_fsm(singletons).fingerprint(), compiled.fingerprint())
+        nfa = FSM.from_original({'0': {'a': {'0', '1'}}, '1': {'b': '0'}}, {'0'}, {'1'})
+        compiled = CompiledDFA.from_fsm(nfa)
+        self.assertEqual(compiled.n_states, 2)
+        self.assertTrue(compiled.accepts('aaba'))
+        self.assertFalse(compiled.accepts('ab'))
+
+    def test_accepts_many(self):
+        print('Compiled DFA: batch acceptance')
+        nfa = {
+            '0': {'a': {'0', '1'}, 'b': '0'},
+            '1': {'a': '2', 'b': '2'},
+            '2': {}
+        }
+        compiled = DeterministicFSM.from_original(nfa, {'0'}, {'2'}).compile()
+        words = [''.join(word) for n in range(7) for word in itertools.product('abc', repeat=n)]
+        self.assertEqual(compiled.accepts_many(words), [compiled.accepts(word) for word in words])
+        self.assertEqual(compiled.accepts_many(map(list, words)), [compiled.accepts(word) for word in words])
+        self.assertEqual(compiled.accepts_many([]), [])
+        byte_dfa = DeterministicFSM.from_original({0: {97: 1}, 1: {98: 0}}, {0}, {1}).compile()
+        self.assertEqual(byte_dfa.accepts_many([b'a', b'ab', b'aba', b'', b'ac']), [True, False, True, False, False])
+
+
+class SerializationTests(unittest.TestCase):
+
+    def test_save_load(self):
+        print('Binary image save/load')
+        words = [tuple(word) for n in range(6) for word in itertools.product(['a', 1, (2, 'b')], repeat=n)]
+        with tempfile.TemporaryDirectory() as path:
+            for _ in range(50):
+                fsm = FSM.generate(
+                    deterministic=False, states_alphabet=range(1000), min_states=0, max_states=9,
+                    transitions_alphabet=['a', 1, (2, 'b')], min_transitions_from_state=0, max_transitions_from_state=3,
+                    min_initial_states=0, max_initial_states=2, min_final_states=0, max_final_states=5)
+                dfsm = DeterministicFSM.from_fsm(fsm)
+                dfsm.save(path + '/dfa.bin')
+                for mmap in (True, False):
+                    loaded = CompiledDFA.load(path + '/dfa.bin', mmap=mmap)
+                    self.assertEqual(loaded.symbols, dfsm.compile().symbols)
+                    self.assertEqual(loaded.fingerprint(), dfsm.fingerprint())
+                    self.assertEqual(loaded.accepts_many(words), [dfsm.accepts(word) for word in words])
+            with open(path + '/dfa.bin', 'r+b') as f:
+                f.write(b'NFA')
+            with self.assertRaises(ValueError):
+                CompiledDFA.load(path + '/dfa.bin')
+            with self.assertRaises(ValueError):
+                DeterministicFSM.from_original({0: {object(): 0}}, {0}, {0}).save(path + '/dfa.bin')
+
+    def test_documented_layout(self):
+        print('Binary image layout matches the CompiledDFA.save docstring')
+        self.assertEqual(_HEADER.size, 24)
+        compiled = DeterministicFSM.from_original({0: {'a': 1}, 1: {'b': 0}}, {0}, {1}).compile()
+        with tempfile.TemporaryDirectory() as path:
+            compiled.save(path + '/dfa.bin')
+            with open(path + '/dfa.bin', 'rb') as f:
+                image = f.read()
+        magic, n_states, n_symbols, initial_state, labels_size = struct.unpack_from('<8sIIiI', image)
+        self.assertEqual((magic, n_states, n_symbols, initial_state), (b'FSMDFA\x00\x01', 2, 2, 0))
+        self.assertEqual((24 + labels_size) % 4, 0)
+        self.assertEqual(image[24:24 + labels_size].decode('utf-8').rstrip(' '), repr(compiled.symbols))
+        table_start = 24 + labels_size
+        table = struct.unpack_from('<4i', image, table_start)
+        self.assertEqual(table, tuple(compiled._table))
+        self.assertEqual(image[table_start + 16:], bytes([sum(1 << state for state in compiled.final_states)]))
+
+
+class AutomatonCacheTests(unittest.TestCase):
+
+    def test_get_or_build(self):
+        print('AutomatonCache hits, misses and eviction')
+        words = [''.join(word) for n in range(6) for word in itertools.product('ab', repeat=n)]
+        with tempfile.TemporaryDirectory() as path:
+            cache = AutomatonCache(path, max_entries=2)
+            specs = [({'0': {'a': {'0', '1'}, 'b': '0'}, '1': {suffix: '2'}, '2': {}}, {'0'}, {'2'})
+                     for suffix in 'ab']
+            specs.append(({'0': {'a': '0', 'ε': '1'}, '1': {'b': '1'}}, {'0'}, {'1'}))
+            for spec in specs:
+                built = cache.get_or_build(*spec)
+                loaded = cache.get_or_build(*spec)
+                self.assertIsInstance(loaded._table, memoryview)
+                fsm = FSM.from_original(*spec)
+                self.assertEqual(cache.key(fsm), cache.key(*spec))
+                self.assertEqual(loaded.fingerprint(), built.fingerprint())
+                self.assertEqual(loaded.accepts_many(words), [fsm.accepts(word) for word in words])
+            self.assertEqual(len(cache), 2)
+            self.assertNotIn(cache.key(*specs[0]), cache)
+            key = cache.key(*specs[2])
+            with open(cache._file_path(key), 'wb') as f:
+                f.write(b'garbage')
+            self.assertIsNone(cache.get(key))
+            self.assertNotIn(key, cache)
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+
+
+class CompiledNFATests(unittest.TestCase):
+
+    def test_random_nfa(self):
+        print('Compiled NFA: bit-parallel simulation random tests')
+        words = [''.join(word) for n in range(5) for word in itertools.product('abc', repeat=n)]
+        for _ in range(200):
+            fsm = FSM.generate(deterministic=False, states_alphabet=range(1000),
+                               min_states=0, max_states=12, transitions_alphabet='ε' + string.ascii_lowercase[:3],
+                               min_transitions_from_state=0, max_transitions_from_state=4,
+                               min_initial_states=0, max_initial_states=3,
+                               min_final_states=0, max_final_states=3)
+            compiled = fsm.compile()
+            self.assertIsInstance(compiled, CompiledNFA)
+            dfsm = DeterministicFSM.from_fsm(fsm)
+            for word in words:
+                self.assertEqual(compiled.accepts(word), fsm.accepts(word), (fsm, word))
+                self.assertEqual(compiled.accepts(word), dfsm.accepts(word), (fsm, word))
+
+    def test_lazy_dfa(self):
+        print('Lazy DFA: bounded cache and NFA fallback')
+        n = 8
+        nfa = {0: {'a': {0, 1}, 'b': 0}}
+        for i in range(1, n):
+            nfa[i] = {'a': i + 1, 'b': i + 1}
+        nfa[n] = {}
+        fsm = FSM.from_original(nfa, {0}, {n})
+        words = [''.join(word) for word in itertools.product('ab', repeat=n + 2)]
+        lazy = LazyDFA(fsm, max_states=1000)
+        for word in words:
+            self.assertEqual(lazy.accepts(word), word[-n] == 'a')
+        self.assertEqual(lazy.stats['evicted_states'], 0)
+        self.assertEqual(lazy.stats['cached_states'], 2 ** n)
+        tiny = LazyDFA(fsm, max_states=4)
+        for word in words:
+            self.assertEqual(tiny.accepts(word), word[-n] == 'a')
+        self.assertLessEqual(tiny.stats['cached_states'], 4)
+        self.assertGreater(tiny.stats['nfa_fallbacks'], 0)
+        # states linked from the cache (in either direction) must be cached ones, however many were evicted
+        for max_states in (1, 4, 100):
+            lazy = LazyDFA(fsm, max_states=max_states, min_symbols_per_state=0)
+            for word in words:
+                self.assertEqual(lazy.accepts(word), word[-n] == 'a')
+                lazy.step(lazy.run(word[:n]), 'a')
+            self.assertGreater(lazy.stats['evicted_states'], 0)
+            cached = {id(lazy_state) for lazy_state in lazy._cache.values()}
+            reachable = set(cached)
+            stack = list(lazy._cache.values())
+            while stack:
+                lazy_state = stack.pop()
+                linked = [target for target in lazy_state.next if target is not None] + \
+                    [source for source, _ in lazy_state.sources]
+                for other in linked:
+                    if id(other) not in reachable:
+                        reachable.add(id(other))
+                        stack.append(other)
+            self.assertEqual(reachable, cached)
+            self.assertLessEqual(len(cached), max_states)
+
+
+class SearchTests(unittest.TestCase):
+
+    def test_spans(self):
+        print('Unanchored search: leftmost-longest and leftmost-first spans against brute force')
+
+        def brute_force(pattern, text, longest):
+            spans = []
+            position = 0
+            while position <= len(text):
+                span = next(((start, (max if longest else min)(ends)) for start in range(position, len(text) + 1)
+                             for ends in [[end for end in range(start, len(text) + 1)
+                                           if re.fullmatch(pattern, text[start:end])]] if ends), None)
+                if span is None:
+                    break
+                spans.append(span)
+                position = span[1] if span[1] > span[0] else span[1] + 1
+            return spans
+
+        rng = random.Random(0)
+        for pattern in ['a+', 'ab|abc', '(ab)*', 'b*', 'a.c', '[ab]+c?', '(a|b)*abb']:
+            explicit = pattern.replace('.', '[abc]')
+            dfsm = regex.compile(pattern, alphabet='abc', minimize=True)
+            searcher = dfsm.searcher()
+            for _ in range(100):
+                text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 10)))
+                for longest in (True, False):
+                    expected = brute_force(explicit, text, longest)
+                    self.assertEqual(list(searcher.finditer(text, longest)), expected, (pattern, text, longest))
+                    self.assertEqual(dfsm.search(text, longest), expected[0] if expected else None)
+                self.assertEqual(dfsm.fullmatch(text), (0, len(text)) if re.fullmatch(explicit, text) else None)
+        self.assertEqual(list(regex.compile('[0-9]+', determinize=True).finditer('x12y345')),
+                         [(1, 3), (4, 7)])
+        digits = regex.compile('[0-9]+', determinize=True)
+        for engine in (digits, digits.searcher()):
+            self.assertEqual(engine.fullmatch(iter('2024')), (0, 4))
+            self.assertEqual(engine.fullmatch(symbol for symbol in '20x4'), None)
+            self.assertEqual(engine.fullmatch(''), None)
+
+    def test_longest_scans_stay_linear(self):
+        print('Unanchored search: overlapping longest-match scans on a long text')
+        # every start scans to the end of the text for a 'c'; without shared scan results this is quadratic
+        searcher = regex.compile('a|a.*c', alphabet='abc', minimize=True).searcher()
+        n = 50000
+        self.assertEqual(list(searcher.finditer('a' * n)), [(i, i + 1) for i in range(n)])
+        self.assertEqual(list(searcher.finditer('a' * n + 'c')), [(0, n + 1)])
+        self.assertEqual(list(searcher.finditer('ab' * n + 'a', longest=False)),
+                         [(i, i + 1) for i in range(0, 2 * n + 1, 2)])
+
+
+class MultiMatcherTests(unittest.TestCase):
+
+    def test_occurrences(self):
+        print('Aho-Corasick: all occurrences, duplicates, chunk boundaries')
+        rng = random.Random(0)
+        for _ in range(100):
+            patterns = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+            text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 40)))
+            matcher = MultiMatcher(patterns)
+            expected = sorted((pattern_id, end) for pattern_id, pattern in enumerate(patterns)
+                              for end in range(len(pattern), len(text) + 1) if text[end - len(pattern):end] == pattern)
+            self.assertEqual(sorted(matcher.findall(text)), expected, (patterns, text))
+            cut = rng.randint(0, len(text))
+            self.assertEqual(sorted(matcher.stream([text[:cut], text[cut:]])), expected, (patterns, text, cut))
+        matcher = MultiMatcher([b'he', b'she', b'his', b'hers'])
+        self.assertEqual(matcher.findall(b'ushers'), [(1, 4), (0, 4), (3, 6)])
+        self.assertTrue(matcher.compiled.accepts(b'shers'))
+        self.assertFalse(matcher.compiled.accepts(b'hi'))
+        with self.assertRaises(ValueError):
+            MultiMatcher(['a', ''])
+
+
+class MatcherTests(unittest.TestCase):
+
+    def test_streaming(self):
+        print('Streaming matcher over chunks')
+        nfa = {
+            '0': {'a': {'0', '1'}, 'b': '0'},
+            '1': {'b': '2'},
+            '2': {}
+        }
+        fsm = FSM.from_original(nfa, {'0'}, {'2'})
+        engines = [fsm.matcher(), DeterministicFSM.from_fsm(fsm).matcher(), Matcher(LazyDFA(fsm))]
+        for matcher in engines:
+            self.assertFalse(matcher.feed('ba'))
+            self.assertTrue(matcher.feed(['b']))
+            saved = pickle.loads(pickle.dumps(matcher.state))
+            self.assertFalse(matcher.feed('bb'))
+            matcher.state = saved
+            self.assertTrue(matcher.is_accepting)
+            self.assertFalse(matcher.feed('c'))
+            self.assertTrue(matcher.is_dead)
+            matcher.reset()
+            self.assertTrue(matcher.feed('aab'))
+        byte_matcher = DeterministicFSM.from_original({0: {97: 1}, 1: {98: 0}}, {0}, {1}).matcher()
+        self.assertTrue(byte_matcher.feed(b'aba'))
+        self.assertFalse(byte_matcher.feed(b'b'))
+
 
 if __name__ == '__main__':
     unittest.main()
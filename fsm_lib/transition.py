@@ -4,7 +4,7 @@ from .epsilon import Epsilon
 
 
 class Transition:
-    __slots__ = ('_label',)
+    __slots__ = ('_label', '_hash')
 
     def __init__(self, label: Union[Hashable, None]):
         if label == Epsilon or label is None:
@@ -26,10 +26,28 @@ class Transition:
         _ = str(value)  # `value` must easily cast to str without throwing an exception
         _ = repr(value)
         self._label = value
+        self._hash = hash((value,))
+
+    @classmethod
+    def _trusted(cls, label: Hashable):
+        """
+        Constructor without validation, for values produced by the library itself.
+        """
+        obj = object.__new__(cls)
+        obj._label = label
+        obj._hash = hash((label,))
+        return obj
 
     def is_epsilon(self):
         return self.label == Epsilon
 
+    def __getstate__(self):
+        return (self._label,)
+
+    def __setstate__(self, state):
+        self._label = state[0]
+        self._hash = hash(state)
+
     def copy(self):
         return self.__class__(self.label)
 
@@ -43,6 +61,8 @@ class Transition:
         return self.label is not None
 
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         try:
             return self.label == other.label if isinstance(other, self.__class__) else False
         except:
@@ -73,4 +93,4 @@ class Transition:
             return str(self.label) <= str(other.label)
 
     def __hash__(self) -> int:
-        return hash((self.label,))
+        return self._hash